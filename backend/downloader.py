@@ -15,6 +15,9 @@ import requests
 from requests.auth import HTTPBasicAuth
 import argparse
 
+# Read size when hashing downloaded archives
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+
 
 class BundleDownloader:
     def __init__(self, api_base: str, api_key: str, cache_dir: str):
@@ -196,9 +199,16 @@ class BundleDownloader:
     
     def _calculate_sha256(self, file_path: Path) -> str:
         """Calculate SHA256 checksum"""
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: hashes through one reused buffer, no bytes per chunk
+            with open(file_path, "rb") as f:
+                return hashlib.file_digest(f, "sha256").hexdigest()
+        
         sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+        # 1 MiB unbuffered reads: far fewer syscalls and update() calls than 4 KiB
+        # blocks, and hashlib drops the GIL while hashing each one
+        with open(file_path, "rb", buffering=0) as f:
+            for byte_block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
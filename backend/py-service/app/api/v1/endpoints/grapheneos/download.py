@@ -4,10 +4,11 @@ This endpoint checks if a build is available and triggers download.
 Used by the frontend to show a download button when the app loads.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional
 import logging
+import time
 
 from app.utils.grapheneos.bundles import (
     get_bundle_for_codename,
@@ -16,14 +17,15 @@ from app.utils.grapheneos.bundles import (
     index_bundles,
 )
 from app.config import settings
+from app.utils import jobstore
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/download", tags=["grapheneos"])
 
-# Store download progress in memory (use Redis in production)
-download_progress: Dict[str, Dict[str, Any]] = {}
+# Minimum seconds between download progress writes
+PROGRESS_UPDATE_INTERVAL = 0.1
 
 
 class DownloadCheckRequest(BaseModel):
@@ -49,7 +51,7 @@ class DownloadStatusResponse(BaseModel):
 
 
 @router.get("/check/{codename}")
-async def check_build_availability(codename: str):
+async def check_build_availability(codename: str, http_request: Request):
     """
     Check if a build is available for download.
     Called when the app loads to determine if download button should be shown.
@@ -75,7 +77,9 @@ async def check_build_availability(codename: str):
         
         # Try to find the latest version available online
         try:
-            latest_version = await find_latest_version(codename, max_days_back=30)
+            latest_version = await find_latest_version(
+                codename, max_days_back=30, client=http_request.app.state.http
+            )
             if latest_version:
                 return {
                     "available": True,
@@ -112,6 +116,7 @@ async def check_build_availability(codename: str):
 async def start_download(
     request: DownloadRequest,
     background_tasks: BackgroundTasks,
+    http_request: Request,
 ):
     """
     Start downloading a GrapheneOS build.
@@ -125,7 +130,9 @@ async def start_download(
     if not version:
         # Find latest version
         try:
-            version = await find_latest_version(codename, max_days_back=30)
+            version = await find_latest_version(
+                codename, max_days_back=30, client=http_request.app.state.http
+            )
             if not version:
                 raise HTTPException(
                     status_code=404,
@@ -139,66 +146,73 @@ async def start_download(
     
     download_id = f"{codename}-{version}"
     
-    # Check if already downloading
-    if download_id in download_progress:
-        progress_info = download_progress[download_id]
-        if progress_info.get("status") == "downloading":
-            raise HTTPException(
-                status_code=400,
-                detail="Download already in progress"
-            )
-        elif progress_info.get("status") == "completed":
-            return {
-                "download_id": download_id,
-                "status": "completed",
-                "message": "Download already completed",
-                "bundle_path": progress_info.get("bundle_path"),
-            }
+    # Check if already downloaded
+    progress_info = await jobstore.get_job(download_id)
+    if progress_info and progress_info.get("status") == "completed":
+        return {
+            "download_id": download_id,
+            "status": "completed",
+            "message": "Download already completed",
+            "bundle_path": progress_info.get("bundle_path"),
+        }
     
-    # Initialize progress
-    download_progress[download_id] = {
+    # Initialize progress, unless the same release is already downloading
+    # (checked atomically, so concurrent requests can't both start it)
+    claimed = await jobstore.claim_job("download", download_id, {
         "status": "downloading",
         "progress": 0.0,
         "downloaded": 0,
         "total": 0,
         "error": None,
         "bundle_path": None,
-    }
+    })
+    if not claimed:
+        raise HTTPException(
+            status_code=400,
+            detail="Download already in progress"
+        )
     
     async def download_with_progress():
         """Background task for downloading"""
         try:
+            last_update = 0.0
+            
             async def progress_cb(progress: float, downloaded: int, total: int):
-                download_progress[download_id] = {
-                    "status": "downloading",
+                # Clients poll status at human rates; cap store writes at 10 Hz
+                nonlocal last_update
+                now = time.monotonic()
+                if now - last_update < PROGRESS_UPDATE_INTERVAL and downloaded < total:
+                    return
+                last_update = now
+                await jobstore.update_job(download_id, {
                     "progress": progress,
                     "downloaded": downloaded,
                     "total": total,
-                    "error": None,
-                    "bundle_path": None,
-                }
+                })
             
             result = await download_release(
                 codename,
                 version,
-                progress_callback=progress_cb
+                progress_callback=progress_cb,
+                client=http_request.app.state.http,
             )
             
-            download_progress[download_id] = {
+            progress_info = await jobstore.get_job(download_id) or {}
+            await jobstore.update_job(download_id, {
                 "status": "completed" if result.get("success") else "error",
                 "progress": 100.0 if result.get("success") else 0.0,
-                "downloaded": download_progress[download_id].get("total", 0),
-                "total": download_progress[download_id].get("total", 0),
+                "downloaded": progress_info.get("total", 0),
+                "total": progress_info.get("total", 0),
                 "error": None if result.get("success") else ", ".join(result.get("errors", [])),
                 "bundle_path": result.get("path"),
-            }
+            })
         except Exception as e:
             logger.error(f"Download failed: {e}", exc_info=True)
-            download_progress[download_id] = {
+            await jobstore.update_job(download_id, {
                 "status": "error",
                 "progress": 0.0,
                 "error": str(e),
-            }
+            })
     
     # Start download in background
     background_tasks.add_task(download_with_progress)
@@ -215,8 +229,9 @@ async def start_download(
 @router.get("/status/{download_id}")
 async def get_download_status(download_id: str):
     """Get download status and progress"""
-    if download_id not in download_progress:
+    progress_info = await jobstore.get_job(download_id)
+    if not progress_info:
         raise HTTPException(status_code=404, detail="Download not found")
     
-    return download_progress[download_id]
+    return progress_info
 
@@ -3,6 +3,7 @@
 import secrets
 import hashlib
 import base64
+import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status, Request
@@ -12,9 +13,14 @@ import logging
 
 from app.config import settings
 from app.core.redis_client import get_redis
-from app.services.email_service import get_email_service
-from app.core.encryption import decrypt_bytes, EncryptionError
-from app.core.key_manager import derive_key_from_passcode
+from app.services.email_service import (
+    get_email_service,
+    REDIS_ACCESS_TOKEN_PREFIX,
+)
+from app.api.v1.endpoints.drive import get_encrypted_file, get_file_metadata
+from app.core.encryption import decrypt_bytes, generate_key, EncryptionError
+from app.core.key_manager import derive_key_from_passcode, generate_salt_for_identifier
+from app.core.secure_derivation import derive_user_key_complex
 
 logger = logging.getLogger(__name__)
 
@@ -148,9 +154,6 @@ async def view_encrypted_content(
         email_service = get_email_service()
         
         # Try to get metadata (for emails) or file metadata (for files)
-        from app.api.v1.endpoints.drive import get_file_metadata
-        from app.services.email_service import REDIS_ACCESS_TOKEN_PREFIX
-        
         redis = await get_redis()
         
         # Check if it's an email token
@@ -164,7 +167,6 @@ async def view_encrypted_content(
         requires_passcode = False
         
         if email_metadata_json:
-            import json
             try:
                 email_metadata = json.loads(email_metadata_json)
                 requires_passcode = email_metadata.get("has_passcode", False)
@@ -687,30 +689,24 @@ async def unlock_public_content(
         redis = await get_redis()
         
         # Try email first
-        from app.services.email_service import REDIS_EMAIL_PREFIX, REDIS_ACCESS_TOKEN_PREFIX, REDIS_PASSCODE_SALT_PREFIX
-        
-        email_data_key = f"{REDIS_EMAIL_PREFIX}{token}"
-        email_data_json = await redis.get(email_data_key)
+        email_data = await get_email_service().get_encrypted_email(
+            token, ("encrypted_content", "encrypted_content_key")
+        )
         
         # Try file
-        from app.api.v1.endpoints.drive import get_encrypted_file, get_file_metadata
-        
         file_data = await get_encrypted_file(token)
         file_metadata = await get_file_metadata(token)
         
         encrypted_content = None
         encrypted_content_key = None
-        salt_base64 = None
+        salt = None
         
-        if email_data_json:
-            import json
-            email_data = json.loads(email_data_json)
+        if email_data:
             encrypted_content = email_data.get("encrypted_content")
             encrypted_content_key = email_data.get("encrypted_content_key")
             
-            # Get salt
-            salt_key = f"{REDIS_PASSCODE_SALT_PREFIX}{token}"
-            salt_base64 = await redis.get(salt_key)
+            # Get salt (stored as raw bytes)
+            salt = await get_email_service().get_passcode_salt(token)
         elif file_data:
             encrypted_content = file_data.get("encrypted_content")
             encrypted_content_key = file_data.get("encrypted_content_key")
@@ -718,6 +714,8 @@ async def unlock_public_content(
             # Get salt
             salt_key = f"drive:passcode_salt:{token}"
             salt_base64 = await redis.get(salt_key)
+            if salt_base64:
+                salt = base64.b64decode(salt_base64)
         else:
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -730,26 +728,9 @@ async def unlock_public_content(
                 content={"error": "Encrypted data not found"}
             )
         
-        # Get salt
-        if not salt_base64:
-            # Try to derive from metadata
-            if file_metadata:
-                owner_email = file_metadata.get("owner_email")
-                if owner_email:
-                    from app.core.key_manager import generate_salt_for_identifier
-                    salt = generate_salt_for_identifier(owner_email)
-                    salt_base64 = base64.b64encode(salt).decode("utf-8")
-        
-        if not salt_base64:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"error": "Passcode salt not found"}
-            )
-        
         # Get user/owner for context (complex derivation)
         user_email = None
-        if email_data_json:
-            import json
+        if email_data:
             meta_key = f"{REDIS_ACCESS_TOKEN_PREFIX}{token}"
             meta_json = await redis.get(meta_key)
             if meta_json:
@@ -760,9 +741,21 @@ async def unlock_public_content(
                     pass
         owner_email = file_metadata.get("owner_email") if file_metadata else None
         
+        # Get salt
+        if not salt:
+            # Salts of emails with a user and of owned files are deterministic
+            # and not stored; derive from metadata
+            identifier = user_email if email_data else owner_email
+            if identifier:
+                salt = generate_salt_for_identifier(identifier)
+        
+        if not salt:
+            return JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"error": "Passcode salt not found"}
+            )
+        
         # Derive key (complex chain - same as email/drive)
-        from app.core.secure_derivation import derive_user_key_complex
-        salt = base64.b64decode(salt_base64)
         base_key = derive_key_from_passcode(unlock_data.passcode, salt)
         ctx = salt + (user_email or owner_email or "passcode").encode()
         passcode_key = derive_user_key_complex(base_key, ctx)
@@ -788,7 +781,6 @@ async def unlock_public_content(
         await reset_unlock_attempts(token)
         
         # Generate session key for device storage
-        from app.core.encryption import generate_key
         session_key = generate_key()
         
         # Store session key (encrypted with content key for device access)
@@ -818,24 +810,18 @@ async def unlock_public_content(
 async def get_encrypted_data(token: str):
     """Get encrypted data for client-side decryption"""
     try:
-        redis = await get_redis()
-        
         # Try email
-        from app.services.email_service import REDIS_EMAIL_PREFIX
-        email_data_key = f"{REDIS_EMAIL_PREFIX}{token}"
-        email_data_json = await redis.get(email_data_key)
+        email_data = await get_email_service().get_encrypted_email(
+            token, ("encrypted_content", "encrypted_content_key")
+        )
         
         # Try file
-        from app.api.v1.endpoints.drive import get_encrypted_file
-        
         file_data = await get_encrypted_file(token)
         
         encrypted_content = None
         encrypted_content_key = None
         
-        if email_data_json:
-            import json
-            email_data = json.loads(email_data_json)
+        if email_data:
             encrypted_content = email_data.get("encrypted_content")
             encrypted_content_key = email_data.get("encrypted_content_key")
         elif file_data:
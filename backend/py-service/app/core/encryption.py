@@ -10,8 +10,11 @@ This module provides authenticated encryption using AES-256-GCM with:
 """
 
 import base64
+import ctypes
 import secrets
-from typing import Dict, Optional, BinaryIO, Tuple
+from typing import Dict, Optional, BinaryIO, Tuple, Union
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
@@ -58,14 +61,27 @@ def derive_key_from_password(password: bytes, salt: Optional[bytes] = None) -> T
     return key, salt
 
 
-def generate_key() -> bytes:
+def generate_key() -> bytearray:
     """
     Generate a cryptographically secure random 256-bit key.
     
+    The key is mutable so callers can wipe it with zeroize() when done.
+    
     Returns:
         32-byte random key suitable for AES-256
     """
-    return secrets.token_bytes(KEY_SIZE)
+    return bytearray(secrets.token_bytes(KEY_SIZE))
+
+
+def zeroize(buf: Optional[bytearray]) -> None:
+    """
+    Overwrite a mutable key buffer with zeros in place.
+    
+    Rebinding a name to b"\x00" * n leaves the original bytes in memory;
+    this clears the buffer itself. Immutable bytes and None are ignored.
+    """
+    if isinstance(buf, bytearray) and buf:
+        ctypes.memset((ctypes.c_char * len(buf)).from_buffer(buf), 0, len(buf))
 
 
 def encrypt_bytes(data: bytes, key: bytes) -> Dict[str, str]:
@@ -110,21 +126,17 @@ def encrypt_bytes(data: bytes, key: bytes) -> Dict[str, str]:
         
         # GCM returns ciphertext + tag concatenated
         # Separate them for clarity in the response
-        # For GCM, tag is always last 16 bytes
-        actual_ciphertext = ciphertext[:-TAG_SIZE]
-        tag = ciphertext[-TAG_SIZE:]
+        # For GCM, tag is always last 16 bytes; slice through a memoryview so
+        # the body isn't copied again before base64 encoding
+        view = memoryview(ciphertext)
         
         # Encode to base64 for safe transport
         result = {
-            "ciphertext": base64.b64encode(actual_ciphertext).decode("utf-8"),
+            "ciphertext": base64.b64encode(view[:-TAG_SIZE]).decode("utf-8"),
             "nonce": base64.b64encode(nonce).decode("utf-8"),
-            "tag": base64.b64encode(tag).decode("utf-8"),
+            "tag": base64.b64encode(view[-TAG_SIZE:]).decode("utf-8"),
         }
-        
-        # Securely overwrite sensitive data in memory
-        # Note: This is best-effort; Python GC makes true zeroization difficult
-        nonce = b"\x00" * len(nonce)
-        actual_ciphertext = b"\x00" * len(actual_ciphertext)
+        view.release()
         
         logger.debug(f"Encrypted {len(data)} bytes of data")
         return result
@@ -134,7 +146,11 @@ def encrypt_bytes(data: bytes, key: bytes) -> Dict[str, str]:
         raise EncryptionError(f"Encryption failed: {str(e)}") from e
 
 
-def decrypt_bytes(payload: Dict[str, str], key: bytes) -> bytes:
+def decrypt_bytes(
+    payload: Dict[str, str],
+    key: bytes,
+    mutable: bool = False,
+) -> Union[bytes, bytearray]:
     """
     Decrypt data encrypted with encrypt_bytes().
     
@@ -149,9 +165,10 @@ def decrypt_bytes(payload: Dict[str, str], key: bytes) -> bytes:
             - "nonce": base64-encoded nonce
             - "tag": base64-encoded authentication tag
         key: 32-byte decryption key (must match encryption key)
+        mutable: Decrypt straight into a bytearray the caller can zeroize()
     
     Returns:
-        Decrypted plaintext data (bytes)
+        Decrypted plaintext data (bytes, or bytearray if mutable)
     
     Raises:
         EncryptionError: If decryption fails, authentication fails, or key is invalid
@@ -183,16 +200,24 @@ def decrypt_bytes(payload: Dict[str, str], key: bytes) -> bytes:
         if len(tag) != TAG_SIZE:
             raise EncryptionError(f"Invalid tag length: expected {TAG_SIZE} bytes, got {len(tag)}")
         
-        # Reconstruct ciphertext + tag (GCM format)
-        # GCM expects ciphertext and tag concatenated
-        full_ciphertext = ciphertext + tag
-        
-        # Create AES-GCM cipher
-        aesgcm = AESGCM(key)
+        # Decrypt the whole body in one update() so OpenSSL can run its
+        # multi-block (AES-NI/VAES) GCM path; passing the tag to the mode
+        # avoids rebuilding ciphertext + tag as another body-sized copy
+        decryptor = Cipher(algorithms.AES(key), modes.GCM(nonce, tag)).decryptor()
+        if mutable:
+            # update_into() wants a block of headroom past the plaintext
+            plaintext = bytearray(len(ciphertext) + 15)
+            del plaintext[decryptor.update_into(ciphertext, plaintext):]
+        else:
+            plaintext = decryptor.update(ciphertext)
         
-        # Decrypt with authentication verification
-        # GCM will raise an exception if authentication fails
-        plaintext = aesgcm.decrypt(nonce, full_ciphertext, None)
+        # Verify the authentication tag (raises InvalidTag on mismatch)
+        try:
+            decryptor.finalize()
+        except InvalidTag:
+            # Don't leave unauthenticated plaintext behind
+            zeroize(plaintext)
+            raise
         
         logger.debug(f"Decrypted {len(plaintext)} bytes of data")
         return plaintext
@@ -200,6 +225,9 @@ def decrypt_bytes(payload: Dict[str, str], key: bytes) -> bytes:
     except EncryptionError:
         # Re-raise our custom errors
         raise
+    except InvalidTag:
+        logger.warning("Decryption failed: Authentication failed (data may be tampered)")
+        raise EncryptionError("Authentication failed: Data may have been tampered with")
     except Exception as e:
         # Catch authentication failures and other errors
         error_msg = str(e).lower()
@@ -209,14 +237,6 @@ def decrypt_bytes(payload: Dict[str, str], key: bytes) -> bytes:
         else:
             logger.error(f"Decryption failed: {e}", exc_info=True)
             raise EncryptionError(f"Decryption failed: {str(e)}") from e
-    finally:
-        # Best-effort secure memory cleanup
-        if 'ciphertext' in locals():
-            ciphertext = b"\x00" * len(ciphertext) if ciphertext else b""
-        if 'nonce' in locals():
-            nonce = b"\x00" * len(nonce) if nonce else b""
-        if 'tag' in locals():
-            tag = b"\x00" * len(tag) if tag else b""
 
 
 def encrypt_stream(
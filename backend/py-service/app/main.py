@@ -9,6 +9,7 @@ if _env_path.exists():
     load_dotenv(_env_path)
 
 from contextlib import asynccontextmanager
+import httpx
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -52,6 +53,7 @@ except ImportError:
 
 # Import GrapheneOS routes
 from app.routes import devices, bundles, flash, source, build, apks
+from app.utils.jobstore import init_jobstore, close_jobstore
 
 # Import FastAPI API routes (if available)
 try:
@@ -68,13 +70,29 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting unified GrapheneOS Installer API server...")
     
+    app.state.redis = None
     if HAS_DB:
         try:
             await init_db()
-            await init_redis()
-            logger.info("Database and Redis initialized")
+            logger.info("Database initialized")
         except Exception as e:
-            logger.warning(f"Database/Redis initialization failed: {e}. Continuing without DB features.")
+            logger.warning(f"Database initialization failed: {e}. Continuing without DB features.")
+        try:
+            app.state.redis = await init_redis()
+            logger.info("Redis initialized")
+        except Exception as e:
+            logger.warning(f"Redis initialization failed: {e}. Continuing without Redis features.")
+    
+    # Flash/build/download job state lives in Redis when available
+    init_jobstore(app.state.redis)
+    
+    # Shared outbound HTTP client (keep-alive + HTTP/2) for release lookups and downloads.
+    # It has no read timeout; every request through it sets its own.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=httpx.Timeout(10.0, read=None),
+    )
     
     logger.info("Application started successfully")
     
@@ -83,6 +101,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down application...")
     
+    await app.state.http.aclose()
+    await close_jobstore()
+    
     if HAS_DB:
         try:
             await close_redis()
@@ -209,6 +230,8 @@ if __name__ == "__main__":
         host=settings.PY_HOST,
         port=settings.PY_PORT,
         reload=settings.DEBUG,
+        timeout_keep_alive=75,  # Reuse connections across polling/SSE requests
+        loop="auto",  # uvloop when installed (not available on Windows)
         log_config=None,  # Use our custom logging
     )
 
@@ -2,15 +2,13 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import platform
-import json
+import uuid
 from ..config import settings
-from sse_starlette.sse import EventSourceResponse
+from ..utils import jobstore
+from ..utils.sse import sse_json, sse_response
 
 router = APIRouter()
 
-# Job storage (in production, use a proper job queue)
-build_jobs: dict = {}
-
 
 @router.post("/start")
 async def start_build():
@@ -28,14 +26,14 @@ async def start_build():
         )
     
     # TODO: Implement actual build logic
-    import uuid
     job_id = str(uuid.uuid4())
     
-    build_jobs[job_id] = {
-        "id": job_id,
-        "status": "not_implemented",
-        "logs": ["Build feature not yet implemented"],
-    }
+    await jobstore.create_job(
+        "build",
+        job_id,
+        {"id": job_id, "status": "not_implemented"},
+        logs=["Build feature not yet implemented"],
+    )
     
     return {"job_id": job_id, "status": "started", "message": "Build feature placeholder"}
 
@@ -43,26 +41,28 @@ async def start_build():
 @router.get("/jobs/{build_job_id}/stream")
 async def stream_build_job(build_job_id: str):
     """Stream build job logs via SSE"""
-    job = build_jobs.get(build_job_id)
+    job = await jobstore.get_job(build_job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    logs = await jobstore.get_logs(build_job_id)
+    
     async def event_generator():
-        for log_line in job.get("logs", []):
-            yield {"event": "log", "data": json.dumps({"line": log_line})}
-        yield {"event": "status", "data": json.dumps({"status": job["status"]})}
-        yield {"event": "close", "data": json.dumps({})}
+        if logs:
+            yield sse_json("logs", {"lines": logs})
+        yield sse_json("status", {"status": job["status"]})
+        yield sse_json("close", {})
     
-    return EventSourceResponse(event_generator())
+    return sse_response(event_generator())
 
 
 @router.post("/jobs/{build_job_id}/cancel")
 async def cancel_build_job(build_job_id: str):
     """Cancel a build job"""
-    if build_job_id not in build_jobs:
+    if not await jobstore.get_job(build_job_id):
         raise HTTPException(status_code=404, detail="Job not found")
     
-    build_jobs[build_job_id]["status"] = "cancelled"
+    await jobstore.set_job_field(build_job_id, "status", "cancelled")
     return {"success": True, "message": "Job cancelled"}
 
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Any
+import asyncio
+import hashlib
+import time
+import orjson
 from ..utils.bundles import (
     index_bundles,
     get_bundle_for_codename,
@@ -9,11 +14,30 @@ from ..utils.bundles import (
     download_release,
     find_latest_version,
 )
+from ..utils import jobstore
 
 router = APIRouter()
 
-# Store download progress in memory (use Redis in production)
-download_progress: Dict[str, Dict[str, Any]] = {}
+# Minimum seconds between download progress writes
+PROGRESS_UPDATE_INTERVAL = 0.1
+
+# Cache-Control for polled lookup endpoints
+LOOKUP_CACHE_CONTROL = "max-age=5, public"
+
+
+def _etag_response(http_request: Request, payload: Any) -> Response:
+    """JSON response with a strong ETag; 304 when the client already has it"""
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": LOOKUP_CACHE_CONTROL}
+    
+    if_none_match = http_request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in candidates or etag in candidates:
+            return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/index")
@@ -23,7 +47,7 @@ async def index_bundles_endpoint():
 
 
 @router.get("/for/{codename}")
-async def get_bundle_for_codename_endpoint(codename: str):
+async def get_bundle_for_codename_endpoint(codename: str, http_request: Request):
     """Get the newest bundle for a codename"""
     bundle = get_bundle_for_codename(codename)
     
@@ -33,7 +57,7 @@ async def get_bundle_for_codename_endpoint(codename: str):
             detail=f"No bundle found for codename: {codename}"
         )
     
-    return bundle
+    return _etag_response(http_request, bundle)
 
 
 @router.post("/verify")
@@ -42,21 +66,22 @@ async def verify_bundle_endpoint(bundle_path: str):
     if not bundle_path:
         raise HTTPException(status_code=400, detail="bundle_path is required")
     
-    result = verify_bundle(bundle_path)
+    # Hashes a multi-GB image; keep it off the event loop
+    result = await asyncio.to_thread(verify_bundle, bundle_path)
     return result
 
 
 @router.get("/releases/{codename}")
-async def get_releases_endpoint(codename: str):
+async def get_releases_endpoint(codename: str, http_request: Request):
     """Get available GrapheneOS releases for a codename"""
-    releases = await get_available_releases(codename)
-    return {"codename": codename, "releases": releases}
+    releases = await get_available_releases(codename, client=http_request.app.state.http)
+    return _etag_response(http_request, {"codename": codename, "releases": releases})
 
 
 @router.get("/find-latest/{codename}")
-async def find_latest_version_endpoint(codename: str):
+async def find_latest_version_endpoint(codename: str, http_request: Request):
     """Find the latest available version for a codename"""
-    latest_version = await find_latest_version(codename)
+    latest_version = await find_latest_version(codename, client=http_request.app.state.http)
     if not latest_version:
         raise HTTPException(
             status_code=404,
@@ -78,57 +103,62 @@ async def progress_callback(progress: float, downloaded: int, total: int):
 @router.post("/download")
 async def download_bundle_endpoint(
     request: DownloadRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    http_request: Request,
 ):
     """Download a GrapheneOS factory image bundle"""
     download_id = f"{request.codename}-{request.version}"
     
-    # Check if already downloading
-    if download_id in download_progress:
-        progress_info = download_progress[download_id]
-        if progress_info.get("status") == "downloading":
-            raise HTTPException(
-                status_code=400,
-                detail="Download already in progress"
-            )
-    
-    # Initialize progress
-    download_progress[download_id] = {
+    # Initialize progress, unless the same release is already downloading
+    # (checked atomically, so concurrent requests can't both start it)
+    claimed = await jobstore.claim_job("download", download_id, {
         "status": "downloading",
         "progress": 0.0,
         "downloaded": 0,
         "total": 0,
         "error": None,
-    }
+    })
+    if not claimed:
+        raise HTTPException(
+            status_code=400,
+            detail="Download already in progress"
+        )
     
     async def download_with_progress():
         try:
+            last_update = 0.0
+            
             async def progress_cb(progress: float, downloaded: int, total: int):
-                download_progress[download_id] = {
-                    "status": "downloading",
+                # Clients poll status at human rates; cap store writes at 10 Hz
+                nonlocal last_update
+                now = time.monotonic()
+                if now - last_update < PROGRESS_UPDATE_INTERVAL and downloaded < total:
+                    return
+                last_update = now
+                await jobstore.update_job(download_id, {
                     "progress": progress,
                     "downloaded": downloaded,
                     "total": total,
-                    "error": None,
-                }
+                })
             
             result = await download_release(
                 request.codename,
                 request.version,
-                progress_callback=progress_cb
+                progress_callback=progress_cb,
+                client=http_request.app.state.http,
             )
             
-            download_progress[download_id] = {
+            await jobstore.update_job(download_id, {
                 "status": "completed",
                 "progress": 100.0,
                 "result": result,
                 "error": None,
-            }
+            })
         except Exception as e:
-            download_progress[download_id] = {
+            await jobstore.update_job(download_id, {
                 "status": "error",
                 "error": str(e),
-            }
+            })
     
     # Start download in background
     background_tasks.add_task(download_with_progress)
@@ -143,8 +173,9 @@ async def download_bundle_endpoint(
 @router.get("/download/{download_id}/status")
 async def get_download_status_endpoint(download_id: str):
     """Get download status and progress"""
-    if download_id not in download_progress:
+    progress_info = await jobstore.get_job(download_id)
+    if not progress_info:
         raise HTTPException(status_code=404, detail="Download not found")
     
-    return download_progress[download_id]
+    return progress_info
 
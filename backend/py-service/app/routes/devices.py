@@ -1,40 +1,53 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from ..utils.tools import get_devices, identify_device, run_adb_command, run_fastboot_command
+from ..utils.tools import (
+    get_devices,
+    identify_device,
+    cached_identify,
+    invalidate_identify_cache,
+    run_adb_command,
+    run_fastboot_command,
+)
 from ..config import settings
+import asyncio
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Maximum number of devices identified in parallel (each spawns adb/fastboot)
+IDENTIFY_CONCURRENCY = 4
+
 
 @router.get("/")
 async def list_devices():
     """List all connected devices"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
     logger.info("Listing devices - checking ADB and Fastboot...")
-    devices = get_devices()
+    devices = await asyncio.to_thread(get_devices)
     logger.info(f"Found {len(devices)} device(s): {[d['serial'] for d in devices]}")
     
-    # Try to identify each device (with timeout handling)
-    for device in devices:
-        if device["state"] in ["device", "fastboot"]:
-            try:
-                logger.debug(f"Identifying device {device['serial']} in {device['state']} state...")
-                identification = identify_device(device["serial"])
-                if identification:
-                    device.update(identification)
-                    logger.info(f"Device {device['serial']} identified as {identification.get('codename', 'unknown')}")
-                else:
-                    logger.warning(f"Could not identify device {device['serial']} - codename not found")
-            except Exception as e:
-                # Log but don't fail - device list should still be returned
-                # even if identification fails (e.g., device is rebooting)
-                logger.warning(f"Could not identify device {device['serial']}: {e}", exc_info=True)
-                # Continue with other devices
+    # Identify devices concurrently (each identification is blocking adb/fastboot I/O)
+    eligible = [device for device in devices if device["state"] in ["device", "fastboot"]]
+    semaphore = asyncio.Semaphore(IDENTIFY_CONCURRENCY)
+    
+    async def identify(device):
+        async with semaphore:
+            logger.debug(f"Identifying device {device['serial']} in {device['state']} state...")
+            return await asyncio.to_thread(cached_identify, device["serial"], device["state"])
+    
+    results = await asyncio.gather(*(identify(device) for device in eligible), return_exceptions=True)
+    
+    for device, identification in zip(eligible, results):
+        if isinstance(identification, Exception):
+            # Log but don't fail - device list should still be returned
+            # even if identification fails (e.g., device is rebooting)
+            logger.warning(f"Could not identify device {device['serial']}: {identification}", exc_info=identification)
+        elif identification:
+            device.update(identification)
+            logger.info(f"Device {device['serial']} identified as {identification.get('codename', 'unknown')}")
+        else:
+            logger.warning(f"Could not identify device {device['serial']} - codename not found")
     
     return devices
 
@@ -42,7 +55,7 @@ async def list_devices():
 @router.get("/{device_id}/identify")
 async def identify_device_endpoint(device_id: str):
     """Identify a device's codename"""
-    identification = identify_device(device_id)
+    identification = await asyncio.to_thread(identify_device, device_id)
     
     if not identification:
         # Return a more informative response instead of 404
@@ -60,7 +73,8 @@ async def identify_device_endpoint(device_id: str):
 @router.post("/{device_id}/reboot/bootloader")
 async def reboot_to_bootloader(device_id: str):
     """Reboot device to bootloader"""
-    result = run_adb_command(["reboot", "bootloader"], serial=device_id)
+    result = await asyncio.to_thread(run_adb_command, ["reboot", "bootloader"], serial=device_id)
+    invalidate_identify_cache(device_id)
     
     if not result:
         raise HTTPException(
@@ -83,7 +97,7 @@ async def debug_fastboot_devices():
     """Debug endpoint to check fastboot device detection"""
     try:
         # Run fastboot devices command directly
-        result = run_fastboot_command(["devices"], timeout=15)
+        result = await asyncio.to_thread(run_fastboot_command, ["devices"], timeout=15)
         
         if result is None:
             return {
@@ -97,7 +111,7 @@ async def debug_fastboot_devices():
             "stderr": result.stderr if result.stderr else "",
             "stdout_raw": repr(result.stdout) if result.stdout else "None",
             "stderr_raw": repr(result.stderr) if result.stderr else "None",
-            "detected_devices": get_devices(),
+            "detected_devices": await asyncio.to_thread(get_devices),
         }
     except Exception as e:
         logger.error(f"Error in debug_fastboot_devices: {e}", exc_info=True)
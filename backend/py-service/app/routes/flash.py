@@ -1,20 +1,80 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import json
-import subprocess
+from typing import Any, Deque, Dict, Optional, Set
+import orjson
 import asyncio
+import functools
+import logging
 import os
+import re
 import sys
+import traceback
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
-from sse_starlette.sse import EventSourceResponse
 from ..utils.tools import identify_device
 from ..utils.bundles import get_bundle_for_codename, index_bundles
-from ..utils.flash import execute_flash_direct, flash_jobs, start_flash_job, get_flash_job, cancel_flash_job
+from ..utils.flash import (
+    execute_flash_direct,
+    flash_processes,
+    start_flash_job,
+    get_flash_job,
+    get_flash_job_logs_json,
+    cancel_flash_job,
+    list_flash_job_summaries,
+)
+from ..utils import jobstore
+from ..utils.sse import SSE_PING, SSE_PING_INTERVAL, last_event_id, sse_json, sse_response
 from ..config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for more lines before sending a single-line logs frame
+STREAM_COALESCE_DELAY = 0.05
+
+# Longest flasher.py output line accepted by the stdout reader
+FLASHER_LINE_LIMIT = 1 << 20
+
+# Classifiers for plain-text (non-JSON) flasher output
+_ERROR_LINE_RE = re.compile(r"error|fail|unable|cannot|traceback|exception", re.IGNORECASE)
+_FATAL_LINE_RE = re.compile(r"traceback|exception|fatal", re.IGNORECASE)
+_TRACEBACK_FRAME_RE = re.compile(r'\s*File ".*", line \d+')
+# Job log lines that make the end-of-run summary redundant
+_FAILURE_TEXT_RE = re.compile(r"failed|error", re.IGNORECASE)
+_COMPLETED_TEXT_RE = re.compile(r"completed successfully", re.IGNORECASE)
+
+# Running unlock-and-flash tasks (the event loop only keeps weak references)
+_flash_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass(slots=True)
+class FlashJob:
+    """Worker-side state of an unlock-and-flash job
+    
+    The task running flasher.py keeps its own view of the job's status and
+    recent log lines and mirrors every change into the job store.
+    """
+    id: str
+    device_serial: str
+    bundle_path: Optional[str] = None
+    status: str = "starting"
+    logs: Deque[str] = field(default_factory=lambda: deque(maxlen=jobstore.MAX_JOB_LOG_LINES))
+    # Set as lines are appended, so the final summary needs no log scan
+    has_error_log: bool = False
+    completed_summary_emitted: bool = False
+    
+    def store_fields(self) -> Dict[str, Any]:
+        """Fields persisted in the job store (same shape as other flash jobs)"""
+        return {
+            "id": self.id,
+            "device_serial": self.device_serial,
+            "bundle_path": self.bundle_path,
+            "dry_run": False,
+            "status": self.status,
+        }
 
 
 class FlashRequest(BaseModel):
@@ -36,46 +96,10 @@ async def execute_flash(request: FlashRequest):
     try:
         # If bundle_path is not provided, try to find it automatically
         bundle_path = request.bundle_path
-        
         if not bundle_path:
-            # Identify device codename from serial
-            device_info = identify_device(request.device_serial)
-            
-            if not device_info:
-                # If identification fails, try to find any bundle and use the first one
-                all_bundles = index_bundles()
-                if not all_bundles:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Could not identify device codename for serial: {request.device_serial} "
-                               f"and no bundles found. Please ensure the device is connected and in ADB or Fastboot mode, "
-                               f"or download a bundle first."
-                    )
-                
-                # Use the first available bundle
-                first_codename = list(all_bundles.keys())[0]
-                bundle = get_bundle_for_codename(first_codename)
-                if bundle:
-                    bundle_path = bundle["path"]
-                else:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Could not identify device and no valid bundles found. "
-                               f"Please download a bundle for your device first."
-                    )
-            else:
-                codename = device_info["codename"]
-                
-                # Find the latest bundle for this codename
-                bundle = get_bundle_for_codename(codename)
-                if not bundle:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"No bundle found for device codename: {codename}. "
-                               f"Please download a bundle first or specify bundle_path."
-                    )
-                
-                bundle_path = bundle["path"]
+            # Only fall back to another device's bundle when identification fails
+            bundle = await _resolve_bundle(request.device_serial, fallback_to_any=False)
+            bundle_path = bundle["path"]
         
         # Execute flash directly
         result = await execute_flash_direct(
@@ -98,86 +122,130 @@ async def execute_flash(request: FlashRequest):
 @router.get("/jobs")
 async def list_flash_jobs():
     """List all flash jobs"""
-    return {
-        "jobs": [
-            {
-                "id": job["id"],
-                "device_serial": job["device_serial"],
-                "status": job["status"],
-                "dry_run": job["dry_run"],
-            }
-            for job in flash_jobs.values()
-        ]
-    }
+    return {"jobs": await list_flash_job_summaries()}
 
 
 @router.get("/jobs/{job_id}")
-async def get_flash_job_endpoint(job_id: str):
-    """Get flash job status and logs"""
-    job = get_flash_job(job_id)
+async def get_flash_job_endpoint(job_id: str, since: Optional[int] = None):
+    """Get flash job status and logs
+    
+    With ``since`` only the lines after that log sequence number are returned
+    (use the ``log_seq`` of the previous response).
+    """
+    job = await get_flash_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return {
+    if since is not None:
+        log_seq, logs = await jobstore.get_logs_since(job_id, max(since, 0))
+        log_count, logs_json = len(logs), orjson.dumps(logs)
+    else:
+        log_seq, log_count, logs_json = await get_flash_job_logs_json(job_id)
+    
+    head = orjson.dumps({
         "id": job["id"],
         "device_serial": job["device_serial"],
         "status": job["status"],
         "dry_run": job.get("dry_run", False),
-        "log_count": len(job.get("logs", [])),
-        "logs": job.get("logs", []),  # Include logs in response
-    }
+        "log_count": log_count,
+        "log_seq": log_seq,
+    })
+    # Splice the pre-encoded log array into the object
+    return Response(
+        content=head[:-1] + b',"logs":' + logs_json + b"}",
+        media_type="application/json",
+    )
 
 
 @router.get("/jobs/{job_id}/stream")
-async def stream_flash_job(job_id: str):
-    """Stream flash job logs via SSE"""
-    job = get_flash_job(job_id)
+async def stream_flash_job(job_id: str, http_request: Request):
+    """Stream flash job logs via SSE
+    
+    Each logs frame carries the job's log sequence number as its event id, so
+    a reconnecting client resumes after the last line it received.
+    """
+    job = await get_flash_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    last_seq = last_event_id(http_request)
+    
     async def event_generator():
-        last_log_count = 0
-        while True:
-            job = get_flash_job(job_id)
-            if not job:
-                yield {"event": "error", "data": json.dumps({"message": "Job not found"})}
-                break
-            
-            # Send new logs
-            if len(job["logs"]) > last_log_count:
-                for log_line in job["logs"][last_log_count:]:
-                    yield {"event": "log", "data": json.dumps({"line": log_line})}
-                last_log_count = len(job["logs"])
-            
-            # Send status updates
-            if job["status"] in ["completed", "failed", "cancelled"]:
-                yield {"event": "status", "data": json.dumps({"status": job["status"]})}
-                yield {"event": "close", "data": json.dumps({})}
-                break
-            
-            yield {"event": "heartbeat", "data": json.dumps({})}
-            
-            import asyncio
-            await asyncio.sleep(0.5)
+        nonlocal last_seq
+        async with jobstore.JobWatcher(job_id) as watcher:
+            while True:
+                # Read status before logs so a terminal status never skips final lines
+                job = await get_flash_job(job_id)
+                if not job:
+                    # Expired or evicted while the client was watching
+                    logger.warning("Flash job %s disappeared while streaming", job_id)
+                    yield sse_json("error", {"message": "Job not found"})
+                    break
+                
+                # Send all lines that arrived since the last wakeup as one frame
+                seq, new_logs = await jobstore.get_logs_since(job_id, last_seq)
+                if len(new_logs) == 1 and job["status"] not in jobstore.TERMINAL_STATUSES:
+                    # A lone line is usually the start of a burst; let the rest
+                    # arrive so it goes out in the same frame
+                    await asyncio.sleep(STREAM_COALESCE_DELAY)
+                    seq, more_logs = await jobstore.get_logs_since(job_id, seq)
+                    new_logs += more_logs
+                if new_logs:
+                    yield sse_json("logs", {"lines": new_logs}, event_id=seq)
+                last_seq = seq
+                
+                # Send status updates
+                if job["status"] in jobstore.TERMINAL_STATUSES:
+                    yield sse_json("status", {"status": job["status"]})
+                    yield sse_json("close", {})
+                    break
+                
+                # Sleep until the worker publishes; ping proxies only while idle
+                if not await watcher.wait(timeout=SSE_PING_INTERVAL):
+                    yield SSE_PING
     
-    return EventSourceResponse(event_generator())
+    return sse_response(event_generator())
 
 
 @router.post("/jobs/{job_id}/cancel")
 async def cancel_flash_job_endpoint(job_id: str):
-    """Cancel a flash job"""
-    success = cancel_flash_job(job_id)
+    """Cancel a flash job
+    
+    Returns once the request is sent to the worker running the job; the job's
+    status becomes "cancelled" when the flash script has been stopped.
+    """
+    success = await cancel_flash_job(job_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="Job not found or cannot be cancelled")
     
-    return {"success": True, "message": "Job cancelled"}
+    return {"success": True, "message": "Cancellation requested"}
+
 
+@functools.lru_cache(maxsize=1)
+def _locate_flasher_script() -> Path:
+    """Find flasher.py (resolved once; a missing script is re-checked on each call)"""
+    # __file__ is at: backend/py-service/app/routes/flash.py
+    # flasher.py is at: backend/flasher.py
+    here = Path(__file__).resolve()
+    candidates = [
+        here.parents[3] / "flasher.py",
+        # Last resort: relative to the project root
+        here.parents[4] / "graohen_os" / "backend" / "flasher.py",
+    ]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(
+        f"Flasher script not found. Searched: {', '.join(str(c) for c in candidates)}. "
+        f"Please ensure flasher.py exists in the backend directory."
+    )
 
-@router.post("/unlock-and-flash")
-async def unlock_and_flash(request: UnlockAndFlashRequest):
+
+@router.post("/unlock-and-flash", status_code=202)
+async def unlock_and_flash(request: UnlockAndFlashRequest, background_tasks: BackgroundTasks):
     """
     Unlock bootloader and flash GrapheneOS in one operation.
     This endpoint uses the flasher.py script which handles the complete workflow:
@@ -185,173 +253,181 @@ async def unlock_and_flash(request: UnlockAndFlashRequest):
     2. Bootloader unlock (with user confirmation)
     3. Flash GrapheneOS
     4. Reboot device
+    
+    Returns 202 immediately; device identification and bundle resolution run
+    in the background and their outcome is reported on the job at the
+    Location URL.
     """
     try:
-        # Find bundle path if not provided
-        bundle_path = request.bundle_path
-        
-        if not bundle_path:
-            # Try to identify device to get codename
-            device_info = identify_device(request.device_serial)
-            
-            if device_info:
-                # Device identified successfully - use its codename
-                codename = device_info["codename"]
-                
-                # Find the latest bundle for this codename
-                bundle = get_bundle_for_codename(codename)
-                if bundle:
-                    bundle_path = bundle["path"]
-                else:
-                    # Device identified but no bundle found - check for any bundles
-                    all_bundles = index_bundles()
-                    if all_bundles:
-                        # Use the first available bundle as fallback
-                        first_codename = list(all_bundles.keys())[0]
-                        bundle = get_bundle_for_codename(first_codename)
-                        if bundle:
-                            bundle_path = bundle["path"]
-                    else:
-                        raise HTTPException(
-                            status_code=404,
-                            detail=f"Device identified as {codename} but no bundle found. "
-                                   f"Please download a bundle first or specify bundle_path."
-                        )
-            else:
-                # Device identification failed (may be rebooting or timing out)
-                # Try to use any available bundle as fallback
-                all_bundles = index_bundles()
-                if not all_bundles:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Could not identify device codename for serial: {request.device_serial} "
-                               f"and no bundles found. Please ensure the device is connected and in fastboot mode, "
-                               f"or download a bundle first, or provide bundle_path."
-                    )
-                
-                # Use the first available bundle as fallback
-                first_codename = list(all_bundles.keys())[0]
-                bundle = get_bundle_for_codename(first_codename)
-                if bundle:
-                    bundle_path = bundle["path"]
-                else:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Could not identify device and no valid bundles found. "
-                               f"Please download a bundle first or specify bundle_path."
-                    )
-        
-        # Find extracted bundle directory (handle both zip and extracted)
-        bundle_path_obj = Path(bundle_path)
-        
-        # Check if it's a zip file or already extracted
-        extracted_dir = bundle_path_obj
-        if bundle_path_obj.is_file() and bundle_path_obj.suffix == ".zip":
-            # If it's a zip, look for extracted directory with same name
-            extracted_name = bundle_path_obj.stem
-            parent_dir = bundle_path_obj.parent
-            extracted_dir = parent_dir / extracted_name
-            if not extracted_dir.exists():
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Bundle appears to be a zip file but extracted directory not found: {extracted_dir}. "
-                           f"Please extract the bundle first."
-                )
-        elif bundle_path_obj.is_dir():
-            # Check for panther-install-* subdirectory
-            panther_dirs = list(bundle_path_obj.glob("panther-install-*"))
-            if panther_dirs:
-                extracted_dir = panther_dirs[0]
-        
-        # Verify flasher.py exists
-        # __file__ is at: backend/py-service/app/routes/flash.py
-        # flasher.py is at: backend/flasher.py
-        # So we need to go up 3 levels: routes -> app -> py-service -> backend
-        flasher_script = Path(__file__).parent.parent.parent.parent / "flasher.py"
-        
-        # Alternative: check relative to backend directory
-        if not flasher_script.exists():
-            # Try from backend directory
-            backend_dir = Path(__file__).parent.parent.parent.parent
-            flasher_script = backend_dir / "flasher.py"
-        
-        if not flasher_script.exists():
-            # Last resort: try absolute path from project root
-            import os
-            project_root = Path(__file__).parent.parent.parent.parent.parent
-            flasher_script = project_root / "graohen_os" / "backend" / "flasher.py"
-        
-        if not flasher_script.exists():
-            raise HTTPException(
-                status_code=500,
-                detail=f"Flasher script not found. Searched: {flasher_script}. "
-                       f"Please ensure flasher.py exists in the backend directory."
-            )
-        
-        # Create job for tracking
-        import uuid
-        job_id = str(uuid.uuid4())
-        
-        job = {
-            "id": job_id,
-            "device_serial": request.device_serial,
-            "bundle_path": str(extracted_dir),
-            "status": "starting",
-            "logs": [],
-            "process": None,
-        }
-        
-        flash_jobs[job_id] = job
-        
-        # Start the unlock and flash process in background
-        import threading
-        thread = threading.Thread(
-            target=_run_unlock_and_flash,
-            args=(job, flasher_script, extracted_dir, request.device_serial, request.skip_unlock)
-        )
-        thread.daemon = True
-        thread.start()
-        
-        return {
-            "success": True,
-            "job_id": job_id,
-            "message": "Unlock and flash process started"
-        }
-        
-    except HTTPException:
-        raise
+        flasher_script = _locate_flasher_script()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Create job for tracking
+    job_id = str(uuid.uuid4())
+    
+    job = FlashJob(
+        id=job_id,
+        device_serial=request.device_serial,
+        bundle_path=request.bundle_path,
+        status="resolving",
+    )
+    
+    try:
+        await jobstore.create_job("flash", job_id, job.store_fields())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start unlock and flash: {str(e)}")
+    
+    background_tasks.add_task(_resolve_and_start, job, request, flasher_script)
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "job_id": job_id,
+            "status": "accepted",
+            "message": "Unlock and flash process accepted",
+        },
+        headers={"Location": f"/flash/jobs/{job_id}"},
+    )
 
 
-def _run_unlock_and_flash(job: dict, flasher_script: Path, bundle_path: Path, device_serial: str, skip_unlock: bool):
-    """Run the unlock and flash process using flasher.py"""
-    import sys
-    import logging
+async def _resolve_bundle(device_serial: str, fallback_to_any: bool) -> Dict[str, Any]:
+    """Pick the newest bundle for a device when the caller gave no bundle_path
+    
+    An identified device only needs its own codename directory scanned; the
+    full bundle index is built only when falling back. If the device cannot
+    be identified, or it has no bundle and ``fallback_to_any`` is set, the
+    first available bundle is used.
+    Raises HTTPException when no usable bundle is found.
+    """
+    device_info = await asyncio.to_thread(identify_device, device_serial)
     
-    # Set up logging
-    logger = logging.getLogger(__name__)
+    if device_info:
+        # Device identified successfully - use its codename
+        codename = device_info["codename"]
+        
+        # Find the latest bundle for this codename
+        bundle = await asyncio.to_thread(get_bundle_for_codename, codename)
+        if bundle:
+            return bundle
+        all_bundles = await asyncio.to_thread(index_bundles) if fallback_to_any else None
+        if not all_bundles:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Device identified as {codename} but no bundle found. "
+                       f"Please download a bundle first or specify bundle_path."
+            )
+    else:
+        all_bundles = await asyncio.to_thread(index_bundles)
+        if not all_bundles:
+            # Device identification failed (may be rebooting or timing out)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Could not identify device codename for serial: {device_serial} "
+                       f"and no bundles found. Please ensure the device is connected and in ADB or Fastboot mode, "
+                       f"or download a bundle first, or provide bundle_path."
+            )
     
-    job_id = job.get("id")
+    # Use the first available bundle as fallback (index lists are newest first)
+    first_codename = next(iter(all_bundles))
+    return all_bundles[first_codename][0]
+
+
+def _find_extracted_dir(bundle_path: str, codename: Optional[str]) -> Path:
+    """Find the extracted bundle directory to flash (blocking; run in a thread)
+    
+    Raises ValueError with a user-facing message when the bundle is not extracted.
+    """
+    # Find extracted bundle directory (handle both zip and extracted)
+    bundle_path_obj = Path(bundle_path)
+    
+    # Check if it's a zip file or already extracted
+    extracted_dir = bundle_path_obj
+    if bundle_path_obj.is_file() and bundle_path_obj.suffix == ".zip":
+        # If it's a zip, look for extracted directory with same name
+        extracted_name = bundle_path_obj.stem
+        parent_dir = bundle_path_obj.parent
+        extracted_dir = parent_dir / extracted_name
+        if not extracted_dir.exists():
+            raise ValueError(
+                f"Bundle appears to be a zip file but extracted directory not found: {extracted_dir}. "
+                f"Please extract the bundle first."
+            )
+    elif bundle_path_obj.is_dir():
+        # Check for a <codename>-install-* subdirectory; stop at the first match
+        pattern = f"{codename}-install-*" if codename else "*-install-*"
+        extracted_dir = next(bundle_path_obj.glob(pattern), extracted_dir)
+    
+    return extracted_dir
+
+
+async def _resolve_and_start(job: FlashJob, request: UnlockAndFlashRequest, flasher_script: Path):
+    """Resolve the bundle for an accepted unlock-and-flash job and start the worker"""
+    job_id = job.id
+    try:
+        bundle_path, codename = request.bundle_path, None
+        if not bundle_path:
+            bundle = await _resolve_bundle(request.device_serial, fallback_to_any=True)
+            bundle_path, codename = bundle["path"], bundle.get("codename")
+        extracted_dir = await asyncio.to_thread(_find_extracted_dir, bundle_path, codename)
+    except Exception as e:
+        message = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.warning(f"Bundle resolution failed for job {job_id}: {message}")
+        await jobstore.append_log(job_id, f"❌ {message}")
+        await jobstore.set_job_field(job_id, "status", "failed")
+        return
+    
+    job.bundle_path = str(extracted_dir)
+    job.status = "starting"
+    await jobstore.update_job(job_id, {"bundle_path": job.bundle_path, "status": job.status})
+    
+    # Run the unlock and flash process as a task on the event loop
+    task = asyncio.create_task(
+        _run_unlock_and_flash(job, flasher_script, extracted_dir, request.device_serial, request.skip_unlock)
+    )
+    _flash_tasks.add(task)
+    task.add_done_callback(_flash_tasks.discard)
+
+
+async def _append_log(job: FlashJob, *lines: str):
+    """Append log lines to the worker's view of the job and to the job store"""
+    job.logs.extend(lines)
+    for line in lines:
+        if not job.has_error_log and _FAILURE_TEXT_RE.search(line):
+            job.has_error_log = True
+        if not job.completed_summary_emitted and _COMPLETED_TEXT_RE.search(line):
+            job.completed_summary_emitted = True
+    await jobstore.append_log(job.id, *lines)
+
+
+async def _set_status(job: FlashJob, status: str):
+    """Set job status on the worker's view of the job and in the job store"""
+    if job.status == status:
+        # e.g. every line of a traceback marks the job failed again
+        return
+    job.status = status
+    await jobstore.set_job_field(job.id, "status", status)
+
+
+async def _run_unlock_and_flash(job: FlashJob, flasher_script: Path, bundle_path: Path, device_serial: str, skip_unlock: bool):
+    """Run the unlock and flash process using flasher.py"""
+    job_id = job.id
     try:
         logger.info(f"Starting unlock and flash for job {job_id}, device {device_serial}")
         logger.info(f"Flasher script: {flasher_script}")
         logger.info(f"Bundle path: {bundle_path}")
         logger.info(f"Skip unlock: {skip_unlock}")
         
-        job["status"] = "running"
-        initial_logs = [
+        await _set_status(job, "running")
+        await _append_log(
+            job,
             f"Starting unlock and flash process for device: {device_serial}",
             f"Using bundle: {bundle_path}",
             f"Flasher script: {flasher_script}",
-        ]
-        job["logs"].extend(initial_logs)
-        # Ensure job is saved
-        if job_id:
-            flash_jobs[job_id] = job
+        )
         
         # Build command
-        import sys
         python_cmd = sys.executable
         
         # Use -u flag to run Python in unbuffered mode (immediate output)
@@ -371,184 +447,108 @@ def _run_unlock_and_flash(job: dict, flasher_script: Path, bundle_path: Path, de
         
         cmd_str = ' '.join(cmd)
         logger.info(f"Executing command: {cmd_str}")
-        job["logs"].append(f"Command: {cmd_str}")
-        if job_id:
-            flash_jobs[job_id] = job
+        await _append_log(job, f"Command: {cmd_str}")
         
         try:
             # Set environment to ensure unbuffered output
             env = os.environ.copy()
             env["PYTHONUNBUFFERED"] = "1"
             
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # Combine stderr into stdout
-                text=True,
-                bufsize=0,  # Unbuffered for immediate output
-                universal_newlines=True,
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,  # Combine stderr into stdout
                 env=env,  # Pass environment with PYTHONUNBUFFERED
+                limit=FLASHER_LINE_LIMIT,
             )
         except Exception as e:
-            job["status"] = "failed"
-            job["logs"].append(f"❌ Failed to start process: {str(e)}")
-            import traceback
-            job["logs"].append(f"Traceback: {traceback.format_exc()}")
-            if job_id:
-                flash_jobs[job_id] = job
+            await _append_log(
+                job,
+                f"❌ Failed to start process: {str(e)}",
+                f"Traceback: {traceback.format_exc()}",
+            )
+            await _set_status(job, "failed")
             return
         
-        job["process"] = process
+        flash_processes[job_id] = process
         logger.info(f"Process started successfully with PID: {process.pid}")
-        job["logs"].append(f"Process started (PID: {process.pid})")
-        if job_id:
-            flash_jobs[job_id] = job
+        await _append_log(job, f"Process started (PID: {process.pid})")
         
         # Read output line by line (both stdout and stderr are combined)
-        # Use a loop that handles both live streaming and final output
-        import select
-        
-        output_lines = []
-        
-        # Simple approach: read all output in real-time
-        # Use readline() with a loop that checks if process is alive
-        import threading
-        
-        def read_output():
-            """Read output in a separate thread"""
-            try:
-                logger.info("Starting output reader thread")
-                line_count = 0
-                # Give process a moment to start producing output
-                import time
-                time.sleep(0.1)
-                
-                # Check if process is still alive
-                if process.poll() is not None:
-                    logger.warning(f"Process already exited with code {process.poll()} before reading output")
-                
-                for line in iter(process.stdout.readline, ''):
-                    if line:
-                        line_stripped = line.rstrip()
-                        output_lines.append(line_stripped)
-                        line_count += 1
-                        logger.info(f"Received line {line_count}: {line_stripped[:100]}...")  # Changed to INFO for debugging
-                        # Process immediately for real-time updates
-                        _process_flasher_output(job, line_stripped, job_id)
-                
-                logger.info(f"Output reader thread finished. Total lines read: {line_count}")
-                if line_count == 0:
-                    logger.warning("No output lines were read from process!")
-                    # Try to read any remaining data
-                    try:
-                        remaining = process.stdout.read()
-                        if remaining:
-                            logger.info(f"Found remaining output: {remaining[:200]}")
-                            for line in remaining.splitlines():
-                                if line.strip():
-                                    output_lines.append(line.strip())
-                                    _process_flasher_output(job, line.strip(), job_id)
-                    except:
-                        pass
-                
-                process.stdout.close()
-            except Exception as e:
-                logger.error(f"Error in output reader thread: {e}", exc_info=True)
-                job["logs"].append(f"❌ Error reading output: {str(e)}")
-                if job_id:
-                    flash_jobs[job_id] = job
-        
-        # Start reader thread
-        reader_thread = threading.Thread(target=read_output, daemon=True)
-        reader_thread.start()
-        
-        # Wait for process to complete and get return code
-        logger.info("Waiting for process to complete...")
-        return_code = process.wait()
-        logger.info(f"Process completed with return code: {return_code}")
-        
-        # Process finished, wait for reader thread to finish (with timeout)
-        logger.info("Waiting for output reader thread to finish...")
-        reader_thread.join(timeout=2.0)
-        logger.info(f"Reader thread finished. Total output lines: {len(output_lines)}")
-        
-        # Read any remaining output
+        line_count = 0
         try:
-            remaining = process.stdout.read()
-            if remaining:
-                for line in remaining.splitlines():
-                    if line.strip():
-                        output_lines.append(line.strip())
-                        _process_flasher_output(job, line.strip(), job_id)
-        except:
-            pass
-        
-        # Output has already been processed in real-time by the reader thread
-        # Just ensure job state is saved
-        if job_id:
-            flash_jobs[job_id] = job
+            async for raw in process.stdout:
+                line_stripped = raw.decode("utf-8", "replace").rstrip()
+                if not line_stripped:
+                    continue
+                line_count += 1
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Received line %d: %.100s", line_count, line_stripped)
+                # Process immediately for real-time updates
+                await _process_flasher_output(job, line_stripped, job_id)
+        except Exception as e:
+            logger.error(f"Error reading flasher output: {e}", exc_info=True)
+            await _append_log(job, f"❌ Error reading output: {str(e)}")
+        
+        # Drain anything left unread (after a reader error) and wait for exit
+        remaining, _ = await process.communicate()
+        return_code = process.returncode
+        logger.info(f"Process completed with return code: {return_code}. Total output lines: {line_count}")
+        for line in remaining.decode("utf-8", "replace").splitlines():
+            if line.strip():
+                line_count += 1
+                await _process_flasher_output(job, line.strip(), job_id)
         
         # If we got no output but process exited, that's suspicious
-        if not output_lines and return_code != 0:
+        if not line_count and return_code != 0:
             error_msg = f"Process exited with code {return_code} but produced no output"
             logger.error(error_msg)
             logger.error(f"Python version: {sys.version}")
             logger.error(f"Command was: {cmd_str}")
-            job["status"] = "failed"
-            job["logs"].append(f"❌ ERROR: {error_msg}")
-            job["logs"].append("This indicates the script failed to start or crashed immediately")
-            job["logs"].append(f"Python version: {sys.version.split()[0]}")
-            job["logs"].append(f"Possible causes:")
-            job["logs"].append(f"  - Python version mismatch")
-            job["logs"].append(f"  - Missing dependencies")
-            job["logs"].append(f"  - Syntax error in flasher.py")
-            job["logs"].append(f"  - Path/permission issues")
-            if job_id:
-                flash_jobs[job_id] = job
-        elif not output_lines and return_code == 0:
+            await _append_log(
+                job,
+                f"❌ ERROR: {error_msg}",
+                "This indicates the script failed to start or crashed immediately",
+                f"Python version: {sys.version.split()[0]}",
+                f"Possible causes:",
+                f"  - Python version mismatch",
+                f"  - Missing dependencies",
+                f"  - Syntax error in flasher.py",
+                f"  - Path/permission issues",
+            )
+            await _set_status(job, "failed")
+        elif not line_count and return_code == 0:
             warning_msg = "Process completed with no output"
             logger.warning(warning_msg)
-            job["logs"].append(f"⚠️ {warning_msg}")
-            if job_id:
-                flash_jobs[job_id] = job
+            await _append_log(job, f"⚠️ {warning_msg}")
         
         # Check final status
         if return_code != 0:
-            job["status"] = "failed"
-            if not any("failed" in log.lower() or "error" in log.lower() for log in job["logs"]):
-                job["logs"].append(f"✗ Process exited with error code: {return_code}")
-        elif job["status"] != "failed" and job["status"] != "completed":
+            if not job.has_error_log:
+                await _append_log(job, f"✗ Process exited with error code: {return_code}")
+            await _set_status(job, "failed")
+        elif job.status != "failed" and job.status != "completed":
             # Process completed successfully but status wasn't set
-            job["status"] = "completed"
-            if not any("completed successfully" in log.lower() for log in job["logs"]):
-                job["logs"].append("✓ Unlock and flash completed successfully!")
+            if not job.completed_summary_emitted:
+                await _append_log(job, "✓ Unlock and flash completed successfully!")
+            await _set_status(job, "completed")
             
     except Exception as e:
-        job["status"] = "failed"
-        error_msg = f"ERROR: {str(e)}"
-        job["logs"].append(error_msg)
-        import traceback
-        job["logs"].append(f"Traceback: {traceback.format_exc()}")
+        await _append_log(job, f"ERROR: {str(e)}", f"Traceback: {traceback.format_exc()}")
+        await _set_status(job, "failed")
     finally:
-        if job.get("process"):
-            job["process"] = None
-        # Ensure job persists with final state
-        if job_id:
-            flash_jobs[job_id] = job
+        flash_processes.pop(job_id, None)
 
 
-def _process_flasher_output(job: dict, line: str, job_id: str):
+async def _process_flasher_output(job: FlashJob, line: str, job_id: str):
     """Process a line of output from flasher.py"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
     if not line:
         return
     
     # Always append the line first (so we don't lose any output)
     try:
         # Try to parse as JSON log
-        log_data = json.loads(line)
+        log_data = orjson.loads(line)
         if "message" in log_data:
             status = log_data.get("status", "info")
             step = log_data.get("step", "unknown")
@@ -561,75 +561,39 @@ def _process_flasher_output(job: dict, line: str, job_id: str):
                 log_line += f" [{partition}]"
             log_line += f" {message}"
             
-            job["logs"].append(log_line)
-            if job_id:
-                flash_jobs[job_id] = job
+            await _append_log(job, log_line)
         elif "success" in log_data:
             # Final result
             if log_data.get("success"):
-                job["status"] = "completed"
-                job["logs"].append("✓ Unlock and flash completed successfully!")
+                await _append_log(job, "✓ Unlock and flash completed successfully!")
+                await _set_status(job, "completed")
             else:
-                job["status"] = "failed"
-                job["logs"].append(f"✗ Failed: {log_data.get('message', 'Unknown error')}")
-            if job_id:
-                flash_jobs[job_id] = job
+                await _append_log(job, f"✗ Failed: {log_data.get('message', 'Unknown error')}")
+                await _set_status(job, "failed")
         elif "status" in log_data and log_data.get("status") == "error":
             # Error log
             error_msg = log_data.get("message", line)
-            logger.error(f"Error from flasher.py: {error_msg}")
-            job["status"] = "failed"
-            job["logs"].append(f"❌ ERROR: {error_msg}")
-            if job_id:
-                flash_jobs[job_id] = job
+            logger.error("Error from flasher.py: %s", error_msg)
+            await _append_log(job, f"❌ ERROR: {error_msg}")
+            await _set_status(job, "failed")
         elif "step" in log_data:
             # Any log with a step field
             step = log_data.get("step", "unknown")
             message = log_data.get("message", line)
             status = log_data.get("status", "info")
             log_line = f"[{step}] {message}"
-            job["logs"].append(log_line)
-            if job_id:
-                flash_jobs[job_id] = job
-    except json.JSONDecodeError:
-        # Not JSON - could be Python traceback, stderr output, or other text
+            await _append_log(job, log_line)
+    except (orjson.JSONDecodeError, TypeError):
+        # Not a JSON object - could be Python traceback, stderr output, or other text
         # Always show it, but mark errors appropriately
-        line_lower = line.lower()
-        if any(keyword in line_lower for keyword in ['error', 'failed', 'fail', 'unable', 'cannot', 'traceback', 'exception']):
-            job["logs"].append(f"❌ {line}")
+        if _ERROR_LINE_RE.search(line):
+            await _append_log(job, f"❌ {line}")
             # If it looks like a fatal error, mark job as failed
-            if any(keyword in line_lower for keyword in ['traceback', 'exception', 'fatal']):
-                job["status"] = "failed"
-        elif line.strip().startswith("File ") and "line" in line and "in" in line:
+            if _FATAL_LINE_RE.search(line):
+                await _set_status(job, "failed")
+        elif _TRACEBACK_FRAME_RE.match(line):
             # Python traceback line
-            job["logs"].append(f"   {line}")
+            await _append_log(job, f"   {line}")
         else:
             # Regular output
-            job["logs"].append(line)
-        if job_id:
-            flash_jobs[job_id] = job
-        
-        # Check final status
-        if return_code != 0:
-            job["status"] = "failed"
-            if not any("failed" in log.lower() or "error" in log.lower() for log in job["logs"]):
-                job["logs"].append(f"✗ Process exited with error code: {return_code}")
-        elif job["status"] != "failed" and job["status"] != "completed":
-            # Process completed successfully but status wasn't set
-            job["status"] = "completed"
-            if not any("completed successfully" in log.lower() for log in job["logs"]):
-                job["logs"].append("✓ Unlock and flash completed successfully!")
-            
-    except Exception as e:
-        job["status"] = "failed"
-        error_msg = f"ERROR: {str(e)}"
-        job["logs"].append(error_msg)
-        import traceback
-        job["logs"].append(f"Traceback: {traceback.format_exc()}")
-    finally:
-        if job.get("process"):
-            job["process"] = None
-        # Ensure job persists with final state
-        if job_id:
-            flash_jobs[job_id] = job
-
+            await _append_log(job, line)
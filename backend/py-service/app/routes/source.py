@@ -1,15 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from pathlib import Path
+import asyncio
 from ..config import settings
 
 router = APIRouter()
 
 
-@router.get("/status")
-async def get_source_status():
-    """Check GrapheneOS source status"""
-    source_root = Path(settings.GRAPHENE_SOURCE_ROOT)
-    
+def _read_source_status(source_root: Path) -> dict:
+    """Inspect the source tree (blocking filesystem access; run in a thread)"""
     if not source_root.exists():
         return {
             "exists": False,
@@ -27,12 +25,10 @@ async def get_source_status():
     # Try to read manifest revision
     manifest_file = repo_dir / "manifests" / ".git" / "HEAD"
     manifest_revision = None
-    if manifest_file.exists():
-        try:
-            with open(manifest_file, "r") as f:
-                manifest_revision = f.read().strip()
-        except Exception:
-            pass
+    try:
+        manifest_revision = manifest_file.read_text().strip()
+    except Exception:
+        pass
     
     return {
         "exists": True,
@@ -42,16 +38,24 @@ async def get_source_status():
     }
 
 
+@router.get("/status")
+async def get_source_status():
+    """Check GrapheneOS source status"""
+    # The source tree may sit on a slow or network filesystem; keep the
+    # stat() and read calls off the event loop
+    return await asyncio.to_thread(_read_source_status, Path(settings.GRAPHENE_SOURCE_ROOT))
+
+
 @router.post("/validate")
 async def validate_source():
     """Validate GrapheneOS source"""
     source_root = Path(settings.GRAPHENE_SOURCE_ROOT)
     
-    if not source_root.exists():
+    if not await asyncio.to_thread(source_root.exists):
         raise HTTPException(status_code=404, detail="Source root does not exist")
     
     repo_dir = source_root / ".repo"
-    if not repo_dir.exists():
+    if not await asyncio.to_thread(repo_dir.exists):
         raise HTTPException(status_code=400, detail="Source not initialized (no .repo directory)")
     
     return {
@@ -8,17 +8,24 @@ This service handles encrypted email storage and retrieval with support for:
 - Two modes: authenticated auto-decrypt or passcode-protected
 """
 
-import secrets
+import asyncio
+import os
+import threading
+import time
 import hashlib
 import base64
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, Literal, Tuple
 from enum import Enum
 
+import orjson
+
 from app.core.encryption import (
     encrypt_bytes,
     decrypt_bytes,
     generate_key,
+    zeroize,
     EncryptionError,
     KEY_SIZE,
 )
@@ -27,9 +34,13 @@ from app.core.key_manager import (
     derive_key_from_passcode,
     generate_salt_for_identifier,
     get_key_manager,
+    SALT_SIZE,
 )
 from app.core.secure_derivation import derive_user_key_complex
 from app.core.redis_client import get_redis
+from redis.asyncio import Redis
+from redis.client import NEVER_DECODE
+from redis.exceptions import ResponseError
 from app.config import settings
 import logging
 
@@ -43,9 +54,16 @@ REDIS_EMAIL_PREFIX = "email:"
 REDIS_ACCESS_TOKEN_PREFIX = "email:access:"
 REDIS_PASSCODE_SALT_PREFIX = "email:passcode_salt:"
 
+# Fields of the encrypted email hash stored under REDIS_EMAIL_PREFIX
+EMAIL_FIELDS = ("encrypted_content", "encrypted_content_key", "stored_at")
+
 # Public access token settings
 ACCESS_TOKEN_SIZE = 32  # bytes
 ACCESS_TOKEN_EXPIRE_HOURS = 168  # 7 days default
+ACCESS_TOKEN_POOL_SIZE = 4096  # bytes of entropy drawn per refill (128 tokens)
+
+# Users whose authenticated-mode salt and key are kept in memory
+DERIVED_KEY_CACHE_SIZE = 10_000
 
 
 class EncryptionMode(str, Enum):
@@ -54,16 +72,135 @@ class EncryptionMode(str, Enum):
     PASSCODE_PROTECTED = "passcode_protected"  # Requires passcode to unlock
 
 
+# Plain-string mode values used on the hot path (stored in metadata as-is)
+_MODE_AUTH = EncryptionMode.AUTHENTICATED.value
+_MODE_PASS = EncryptionMode.PASSCODE_PROTECTED.value
+
+
 class EmailEncryptionError(Exception):
     """Custom exception for email encryption errors"""
     pass
 
 
+def _stored_salt(value: Optional[bytes]) -> Optional[bytes]:
+    """Passcode salt from its stored form (raw bytes, or base64 text for older records)"""
+    if not value:
+        return None
+    if len(value) == SALT_SIZE:
+        return value
+    return base64.b64decode(value)
+
+
+def _now_ms() -> int:
+    """Current time as epoch milliseconds, used for stored_at/created_at"""
+    return time.time_ns() // 1_000_000
+
+
+def _email_from_fields(
+    fields: Tuple[str, ...], values: list
+) -> Optional[Dict[str, Any]]:
+    """Build an encrypted email dict from HMGET results, decoding the JSON payloads"""
+    email_data: Dict[str, Any] = {}
+    for field, value in zip(fields, values):
+        if value is None:
+            continue
+        email_data[field] = value if field == "stored_at" else _loads_or_none(value)
+    return email_data or None
+
+
+class _TokenPool:
+    """
+    Entropy buffer for access tokens, refilled a page at a time.
+    
+    One os.urandom call serves ACCESS_TOKEN_POOL_SIZE // ACCESS_TOKEN_SIZE
+    tokens; bytes handed out are zeroed in the buffer so they aren't kept.
+    A forked child discards the buffer it inherited, otherwise every worker
+    forked from the same parent (gunicorn preload, multiprocessing) would
+    hand out the same tokens.
+    """
+    
+    def __init__(self, size: int = ACCESS_TOKEN_POOL_SIZE):
+        self._size = size
+        self._buffer = bytearray(os.urandom(size))
+        self._offset = 0
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):  # not available on Windows
+            os.register_at_fork(after_in_child=self._discard)
+    
+    def _discard(self) -> None:
+        """Drop the inherited bytes so the next take() refills from os.urandom"""
+        # The parent's lock may have been held by another thread at fork time
+        self._lock = threading.Lock()
+        self._buffer[:] = bytes(self._size)
+        self._offset = self._size
+    
+    def take(self, n: int) -> bytes:
+        with self._lock:
+            if self._offset + n > self._size:
+                self._buffer[:] = os.urandom(self._size)
+                self._offset = 0
+            start = self._offset
+            self._offset += n
+            chunk = bytes(self._buffer[start:self._offset])
+            self._buffer[start:self._offset] = bytes(n)
+            return chunk
+
+
+_token_pool = _TokenPool()
+
+
+def _loads_or_none(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse a stored JSON record, treating missing or corrupt values as absent"""
+    if not value:
+        return None
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return None
+
+
+@lru_cache(maxsize=DERIVED_KEY_CACHE_SIZE)
+def _user_key_bundle(user_email: str) -> Tuple[bytes, bytes]:
+    """
+    Deterministic salt and authenticated-mode key for a user, memoized per process.
+    
+    Both depend only on the email, so every encrypt/decrypt for the same user
+    would otherwise repeat the salt expansion and the whole Argon2id + complex
+    chain. Passcode-derived keys are deliberately not cached.
+    """
+    user_salt = generate_salt_for_identifier(user_email)
+    base_key = derive_key_from_passcode(user_email, user_salt)
+    return user_salt, derive_user_key_complex(base_key, user_salt + user_email.encode())
+
+
+def _derive_user_key(user_email: str) -> bytearray:
+    """Authenticated-mode key: Argon2id base + complex chain (same as drive)
+
+    Returns a private copy so callers can zeroize it without touching the cache.
+    """
+    _, user_key = _user_key_bundle(user_email)
+    return bytearray(user_key)
+
+
+def _derive_passcode_key(passcode: str, salt: bytes, user_email: Optional[str]) -> bytearray:
+    """Passcode-mode key: Argon2id base + complex chain (same as drive/auth)"""
+    base_key = derive_key_from_passcode(passcode, salt)
+    ctx = salt + (user_email.encode() if user_email else b"passcode")
+    return bytearray(derive_user_key_complex(base_key, ctx))
+
+
 class EmailService:
     """Service for encrypted email operations"""
     
     def __init__(self):
         self.key_manager = get_key_manager()
+        self._redis: Optional[Redis] = None
+    
+    async def _get_redis(self) -> Redis:
+        """Shared Redis client, resolved once and kept on the instance"""
+        if self._redis is None:
+            self._redis = await get_redis()
+        return self._redis
     
     def generate_public_access_token(self) -> str:
         """
@@ -72,8 +209,8 @@ class EmailService:
         Returns:
             Base64-encoded access token
         """
-        token_bytes = secrets.token_bytes(ACCESS_TOKEN_SIZE)
-        token = base64.urlsafe_b64encode(token_bytes).decode("utf-8").rstrip("=")
+        token_bytes = _token_pool.take(ACCESS_TOKEN_SIZE)
+        token = base64.urlsafe_b64encode(token_bytes).rstrip(b"=").decode("ascii")
         return token
     
     async def encrypt_email_content(
@@ -109,6 +246,7 @@ class EmailService:
         Raises:
             EmailEncryptionError: If encryption fails
         """
+        content_key = passcode_key = user_key = None
         try:
             # Generate random content key
             content_key = generate_key()
@@ -118,34 +256,29 @@ class EmailService:
             
             # Determine encryption mode
             if passcode:
-                encryption_mode = EncryptionMode.PASSCODE_PROTECTED
+                encryption_mode = _MODE_PASS
                 # Derive key from passcode
-                # Use email as salt identifier for deterministic salt generation
-                if user_email:
-                    salt = generate_salt_for_identifier(user_email)
+                # Use the email (lowercased, as stored in metadata) as salt
+                # identifier so decryption can regenerate the salt from it
+                owner_email = user_email.lower() if user_email else None
+                if owner_email:
+                    salt = generate_salt_for_identifier(owner_email)
                 else:
-                    # Generate random salt if no user email
+                    # Generate random salt if no user email; only this one is stored
                     salt = self.key_manager.generate_salt()
                 
                 # Derive key: Argon2id base + complex chain (same as drive/auth)
-                base_key = derive_key_from_passcode(passcode, salt)
-                ctx = salt + (user_email.encode() if user_email else b"passcode")
-                passcode_key = derive_user_key_complex(base_key, ctx)
+                passcode_key = await asyncio.to_thread(
+                    _derive_passcode_key, passcode, salt, owner_email
+                )
                 
                 # Encrypt content key with passcode-derived key
                 encrypted_content_key = encrypt_bytes(content_key, passcode_key)
                 
-                # Store salt in Redis for later retrieval
-                # We'll use the access token to retrieve it
-                # For now, we'll include salt in the response (encrypted)
-                # In production, store salt separately with access token
-                
             elif user_email:
-                encryption_mode = EncryptionMode.AUTHENTICATED
+                encryption_mode = _MODE_AUTH
                 # Derive user key: Argon2id base + complex chain (same as drive)
-                user_salt = generate_salt_for_identifier(user_email)
-                base_key = derive_key_from_passcode(user_email, user_salt)
-                user_key = derive_user_key_complex(base_key, user_salt + user_email.encode())
+                user_key = await asyncio.to_thread(_derive_user_key, user_email)
                 
                 # Encrypt content key with user key
                 encrypted_content_key = encrypt_bytes(content_key, user_key)
@@ -163,45 +296,30 @@ class EmailService:
                 expires_at = datetime.utcnow() + timedelta(hours=expires_in_hours)
                 expires_seconds = int(expires_in_hours * 3600)
             
-            # Store encrypted email data in Redis
-            await self.store_encrypted_email(
+            # Store encrypted blob, metadata and (random) passcode salt in one round trip
+            await self._store_all(
                 access_token=access_token,
-                encrypted_content=encrypted_content,
-                encrypted_content_key=encrypted_content_key,
-                expires_in_seconds=expires_seconds,
+                email_fields=self._email_fields(encrypted_content, encrypted_content_key),
+                metadata_json=self._metadata_json(
+                    encryption_mode, user_email, passcode is not None
+                ),
+                salt=salt if passcode and not user_email else None,
+                ttl=expires_seconds,
             )
             
-            # Store metadata in Redis
-            await self._store_email_metadata(
-                access_token=access_token,
-                encryption_mode=encryption_mode.value,
-                user_email=user_email,
-                has_passcode=passcode is not None,
-                expires_in_seconds=expires_seconds,
-            )
-            
-            # Store passcode salt if passcode mode
-            if passcode:
-                if user_email:
-                    salt_base64 = base64.b64encode(salt).decode("utf-8")
-                else:
-                    # If no user_email, use the generated random salt
-                    salt_base64 = base64.b64encode(salt).decode("utf-8")
-                await self._store_passcode_salt(access_token, salt_base64, expires_seconds)
-            
             # Return only encrypted payloads (no plaintext)
             result = {
                 "encrypted_content": encrypted_content,
                 "encrypted_content_key": encrypted_content_key,
                 "access_token": access_token,
-                "encryption_mode": encryption_mode.value,
+                "encryption_mode": encryption_mode,
             }
             
             if expires_at:
                 result["expires_at"] = expires_at.isoformat()
             
             logger.info(
-                f"Email encrypted: mode={encryption_mode.value}, "
+                f"Email encrypted: mode={encryption_mode}, "
                 f"token={access_token[:8]}..., expires={expires_at}"
             )
             
@@ -214,19 +332,16 @@ class EmailService:
             logger.error(f"Email encryption failed: {e}", exc_info=True)
             raise EmailEncryptionError(f"Unexpected error: {str(e)}") from e
         finally:
-            # Securely overwrite sensitive data
-            if 'content_key' in locals():
-                content_key = b"\x00" * len(content_key)
-            if 'passcode_key' in locals():
-                passcode_key = b"\x00" * len(passcode_key) if passcode_key else b""
-            if 'user_key' in locals():
-                user_key = b"\x00" * len(user_key) if user_key else b""
+            # Wipe key material in place
+            zeroize(content_key)
+            zeroize(passcode_key)
+            zeroize(user_key)
     
     async def decrypt_email_for_authenticated_user(
         self,
         access_token: str,
         user_email: str,
-    ) -> bytes:
+    ) -> bytearray:
         """
         Decrypt email for authenticated user (no passcode required).
         
@@ -235,54 +350,47 @@ class EmailService:
             user_email: Authenticated user's email
         
         Returns:
-            Decrypted email body bytes
+            Decrypted email body; the caller may zeroize() it once sent
         
         Raises:
             EmailEncryptionError: If decryption fails or access denied
         """
+        user_key = content_key = None
         try:
-            # Get email metadata
-            metadata = await self._get_email_metadata(access_token)
-            if not metadata:
+            # Get metadata and encrypted data in one round trip
+            metadata, encrypted_data, _ = await self._fetch_all(
+                access_token, ("encrypted_content", "encrypted_content_key")
+            )
+            # Same answer whichever key is missing, decided from the one reply
+            if not metadata or not encrypted_data:
                 raise EmailEncryptionError("Email not found or expired")
             
             # Verify encryption mode
-            if metadata["encryption_mode"] != EncryptionMode.AUTHENTICATED.value:
+            if metadata["encryption_mode"] != _MODE_AUTH:
                 raise EmailEncryptionError("Email requires passcode unlock")
             
             # Verify user access
             if metadata.get("user_email") and metadata["user_email"] != user_email.lower():
                 raise EmailEncryptionError("Access denied: email belongs to different user")
             
-            # Get encrypted data from storage
-            encrypted_data = await self._get_encrypted_email(access_token)
-            if not encrypted_data:
-                raise EmailEncryptionError("Encrypted email data not found")
-            
             encrypted_content = encrypted_data["encrypted_content"]
             encrypted_content_key = encrypted_data["encrypted_content_key"]
             
             # Derive user key (same as encryption - complex chain)
-            user_salt = generate_salt_for_identifier(user_email)
-            base_key = derive_key_from_passcode(user_email, user_salt)
-            user_key = derive_user_key_complex(base_key, user_salt + user_email.encode())
+            user_key = await asyncio.to_thread(_derive_user_key, user_email)
             
             # Decrypt content key
             try:
-                content_key = decrypt_bytes(encrypted_content_key, user_key)
+                content_key = decrypt_bytes(encrypted_content_key, user_key, mutable=True)
             except EncryptionError as e:
                 raise EmailEncryptionError(f"Failed to decrypt content key: {str(e)}")
             
             # Decrypt email content
             try:
-                email_body = decrypt_bytes(encrypted_content, content_key)
+                email_body = decrypt_bytes(encrypted_content, content_key, mutable=True)
             except EncryptionError as e:
                 raise EmailEncryptionError(f"Failed to decrypt email content: {str(e)}")
             
-            # Securely overwrite
-            content_key = b"\x00" * len(content_key)
-            user_key = b"\x00" * len(user_key)
-            
             logger.info(f"Email decrypted for authenticated user: {user_email}, token={access_token[:8]}...")
             
             return email_body
@@ -292,12 +400,16 @@ class EmailService:
         except Exception as e:
             logger.error(f"Email decryption failed: {e}", exc_info=True)
             raise EmailEncryptionError(f"Decryption failed: {str(e)}") from e
+        finally:
+            # Wipe the derived and content keys in place
+            zeroize(user_key)
+            zeroize(content_key)
     
     async def decrypt_email_with_passcode(
         self,
         access_token: str,
         passcode: str,
-    ) -> bytes:
+    ) -> bytearray:
         """
         Decrypt email using passcode.
         
@@ -306,70 +418,67 @@ class EmailService:
             passcode: Passcode used for encryption
         
         Returns:
-            Decrypted email body bytes
+            Decrypted email body; the caller may zeroize() it once sent
         
         Raises:
             EmailEncryptionError: If decryption fails or passcode incorrect
         """
+        passcode_key = content_key = None
         try:
-            # Get email metadata
-            metadata = await self._get_email_metadata(access_token)
-            if not metadata:
+            # Get metadata, content key and passcode salt in one round trip; the
+            # body is only fetched once the passcode has unlocked the content key
+            metadata, encrypted_data, stored_salt = await self._fetch_all(
+                access_token, ("encrypted_content_key",)
+            )
+            # Same answer whichever key is missing, decided from the one reply
+            if not metadata or not encrypted_data or not encrypted_data.get("encrypted_content_key"):
                 raise EmailEncryptionError("Email not found or expired")
             
             # Verify encryption mode
-            if metadata["encryption_mode"] != EncryptionMode.PASSCODE_PROTECTED.value:
+            if metadata["encryption_mode"] != _MODE_PASS:
                 raise EmailEncryptionError("Email does not require passcode")
             
             if not metadata.get("has_passcode"):
                 raise EmailEncryptionError("Email was not encrypted with passcode")
             
-            # Get encrypted data
-            encrypted_data = await self._get_encrypted_email(access_token)
-            if not encrypted_data:
-                raise EmailEncryptionError("Encrypted email data not found")
-            
-            encrypted_content = encrypted_data["encrypted_content"]
             encrypted_content_key = encrypted_data["encrypted_content_key"]
             
             # Get passcode salt
             user_email = metadata.get("user_email")
             if user_email:
-                salt_base64 = await self._get_passcode_salt(access_token)
-                if salt_base64:
-                    salt = base64.b64decode(salt_base64)
-                else:
-                    # Fallback: generate deterministic salt from email
-                    salt = generate_salt_for_identifier(user_email)
+                # Deterministic salt from the email; it isn't stored
+                salt = generate_salt_for_identifier(user_email)
             else:
-                # No user email, try to get stored salt
-                salt_base64 = await self._get_passcode_salt(access_token)
-                if not salt_base64:
+                # No user email, the stored salt is required
+                if not stored_salt:
                     raise EmailEncryptionError("Passcode salt not found")
-                salt = base64.b64decode(salt_base64)
+                salt = stored_salt
             
             # Derive key (same as encryption - complex chain)
-            base_key = derive_key_from_passcode(passcode, salt)
-            ctx = salt + (user_email.encode() if user_email else b"passcode")
-            passcode_key = derive_user_key_complex(base_key, ctx)
+            passcode_key = await asyncio.to_thread(
+                _derive_passcode_key, passcode, salt, user_email
+            )
             
             # Decrypt content key
             try:
-                content_key = decrypt_bytes(encrypted_content_key, passcode_key)
+                content_key = decrypt_bytes(encrypted_content_key, passcode_key, mutable=True)
             except EncryptionError:
                 # Invalid passcode
                 raise EmailEncryptionError("Incorrect passcode")
             
+            encrypted_content = encrypted_data.get("encrypted_content")
+            if encrypted_content is None:
+                body = await self.get_encrypted_email(access_token, ("encrypted_content",))
+                encrypted_content = body.get("encrypted_content") if body else None
+            if not encrypted_content:
+                raise EmailEncryptionError("Encrypted email data not found")
+            
             # Decrypt email content
             try:
-                email_body = decrypt_bytes(encrypted_content, content_key)
+                email_body = decrypt_bytes(encrypted_content, content_key, mutable=True)
             except EncryptionError as e:
                 raise EmailEncryptionError(f"Failed to decrypt email content: {str(e)}")
             
-            # Securely overwrite
-            content_key = b"\x00" * len(content_key)
-            passcode_key = b"\x00" * len(passcode_key)
-            
             logger.info(f"Email decrypted with passcode: token={access_token[:8]}...")
             
             return email_body
@@ -379,6 +488,74 @@ class EmailService:
         except Exception as e:
             logger.error(f"Email decryption failed: {e}", exc_info=True)
             raise EmailEncryptionError(f"Decryption failed: {str(e)}") from e
+        finally:
+            # Wipe the derived and content keys in place
+            zeroize(passcode_key)
+            zeroize(content_key)
+    
+    @staticmethod
+    def _email_fields(
+        encrypted_content: Dict[str, str],
+        encrypted_content_key: Dict[str, str],
+    ) -> Dict[str, Any]:
+        """
+        Hash fields of the encrypted email stored under REDIS_EMAIL_PREFIX.
+        
+        Content and content key are separate fields so readers can fetch the
+        small content key on its own before pulling the body.
+        """
+        return {
+            "encrypted_content": orjson.dumps(encrypted_content),
+            "encrypted_content_key": orjson.dumps(encrypted_content_key),
+            "stored_at": _now_ms(),
+        }
+    
+    @staticmethod
+    def _metadata_json(
+        encryption_mode: str,
+        user_email: Optional[str],
+        has_passcode: bool,
+    ) -> bytes:
+        """Serialize the metadata record stored under REDIS_ACCESS_TOKEN_PREFIX"""
+        return orjson.dumps({
+            "encryption_mode": encryption_mode,
+            "user_email": user_email.lower() if user_email else None,
+            "has_passcode": has_passcode,
+            "created_at": _now_ms(),
+        })
+    
+    async def _store_all(
+        self,
+        access_token: str,
+        email_fields: Dict[str, Any],
+        metadata_json: bytes,
+        salt: Optional[bytes],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Write the encrypted email, its metadata and passcode salt in one pipeline.
+        
+        The pipeline is non-transactional: the keys don't need to be written
+        atomically, so skipping MULTI/EXEC keeps it to a single round trip.
+        """
+        redis = await self._get_redis()
+        email_key = f"{REDIS_EMAIL_PREFIX}{access_token}"
+        entries = [(f"{REDIS_ACCESS_TOKEN_PREFIX}{access_token}", metadata_json)]
+        if salt:
+            entries.append((f"{REDIS_PASSCODE_SALT_PREFIX}{access_token}", salt))
+        
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hset(email_key, mapping=email_fields)
+            if ttl:
+                pipe.expire(email_key, ttl)
+            for key, value in entries:
+                if ttl:
+                    pipe.setex(key, ttl, value)
+                else:
+                    pipe.set(key, value)
+            await pipe.execute()
+        
+        logger.debug(f"Encrypted email stored: token={access_token[:8]}...")
     
     async def store_encrypted_email(
         self,
@@ -396,24 +573,14 @@ class EmailService:
             encrypted_content_key: Encrypted content key payload
             expires_in_seconds: Expiration time in seconds (optional)
         """
-        redis = await get_redis()
-        
-        email_data = {
-            "encrypted_content": encrypted_content,
-            "encrypted_content_key": encrypted_content_key,
-            "stored_at": datetime.utcnow().isoformat(),
-        }
-        
-        # Convert to JSON string for storage
-        import json
-        email_json = json.dumps(email_data)
-        
+        redis = await self._get_redis()
         key = f"{REDIS_EMAIL_PREFIX}{access_token}"
         
-        if expires_in_seconds:
-            await redis.setex(key, expires_in_seconds, email_json)
-        else:
-            await redis.set(key, email_json)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=self._email_fields(encrypted_content, encrypted_content_key))
+            if expires_in_seconds:
+                pipe.expire(key, expires_in_seconds)
+            await pipe.execute()
         
         logger.debug(f"Encrypted email stored: token={access_token[:8]}...")
     
@@ -426,17 +593,8 @@ class EmailService:
         expires_in_seconds: Optional[int] = None,
     ) -> None:
         """Store email metadata in Redis"""
-        redis = await get_redis()
-        
-        metadata = {
-            "encryption_mode": encryption_mode,
-            "user_email": user_email.lower() if user_email else None,
-            "has_passcode": has_passcode,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-        
-        import json
-        metadata_json = json.dumps(metadata)
+        redis = await self._get_redis()
+        metadata_json = self._metadata_json(encryption_mode, user_email, has_passcode)
         
         key = f"{REDIS_ACCESS_TOKEN_PREFIX}{access_token}"
         
@@ -445,56 +603,98 @@ class EmailService:
         else:
             await redis.set(key, metadata_json)
     
+    async def _fetch_all(
+        self,
+        access_token: str,
+        fields: Tuple[str, ...] = EMAIL_FIELDS,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[bytes]]:
+        """
+        Get metadata, encrypted email fields and passcode salt in one round trip.
+        
+        Args:
+            access_token: Public access token
+            fields: Encrypted email hash fields to read
+        
+        Returns:
+            (metadata, encrypted_data, salt); each is None when missing
+            or, for the JSON records, unparseable
+        """
+        redis = await self._get_redis()
+        email_key = f"{REDIS_EMAIL_PREFIX}{access_token}"
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(f"{REDIS_ACCESS_TOKEN_PREFIX}{access_token}")
+            pipe.hmget(email_key, fields)
+            pipe.execute_command(
+                "GET", f"{REDIS_PASSCODE_SALT_PREFIX}{access_token}", **{NEVER_DECODE: True}
+            )
+            metadata_json, email_values, salt = await pipe.execute(raise_on_error=False)
+        
+        if isinstance(metadata_json, Exception):
+            raise metadata_json
+        if isinstance(salt, Exception):
+            raise salt
+        
+        if isinstance(email_values, ResponseError):
+            # Stored before emails became hashes: a single JSON string
+            encrypted_data = _loads_or_none(await redis.get(email_key))
+        else:
+            encrypted_data = _email_from_fields(fields, email_values)
+        
+        return _loads_or_none(metadata_json), encrypted_data, _stored_salt(salt)
+    
     async def _get_email_metadata(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Get email metadata from Redis"""
-        redis = await get_redis()
+        redis = await self._get_redis()
         key = f"{REDIS_ACCESS_TOKEN_PREFIX}{access_token}"
         
-        metadata_json = await redis.get(key)
-        if not metadata_json:
-            return None
-        
-        import json
-        try:
-            return json.loads(metadata_json)
-        except json.JSONDecodeError:
-            return None
+        return _loads_or_none(await redis.get(key))
     
-    async def _get_encrypted_email(self, access_token: str) -> Optional[Dict[str, Any]]:
-        """Get encrypted email data from Redis"""
-        redis = await get_redis()
-        key = f"{REDIS_EMAIL_PREFIX}{access_token}"
+    async def get_encrypted_email(
+        self,
+        access_token: str,
+        fields: Tuple[str, ...] = EMAIL_FIELDS,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get encrypted email data from Redis.
         
-        email_json = await redis.get(key)
-        if not email_json:
-            return None
+        Args:
+            access_token: Public access token
+            fields: Encrypted email hash fields to read
+        
+        Returns:
+            Dictionary of the requested fields that exist, or None if not found
+        """
+        redis = await self._get_redis()
+        key = f"{REDIS_EMAIL_PREFIX}{access_token}"
         
-        import json
         try:
-            return json.loads(email_json)
-        except json.JSONDecodeError:
-            return None
+            values = await redis.hmget(key, fields)
+        except ResponseError:
+            # Stored before emails became hashes: a single JSON string
+            return _loads_or_none(await redis.get(key))
+        return _email_from_fields(fields, values)
     
     async def _store_passcode_salt(
         self,
         access_token: str,
-        salt_base64: str,
+        salt: bytes,
         expires_in_seconds: Optional[int] = None,
     ) -> None:
-        """Store passcode salt in Redis"""
-        redis = await get_redis()
+        """Store passcode salt in Redis as raw bytes"""
+        redis = await self._get_redis()
         key = f"{REDIS_PASSCODE_SALT_PREFIX}{access_token}"
         
         if expires_in_seconds:
-            await redis.setex(key, expires_in_seconds, salt_base64)
+            await redis.setex(key, expires_in_seconds, salt)
         else:
-            await redis.set(key, salt_base64)
+            await redis.set(key, salt)
     
-    async def _get_passcode_salt(self, access_token: str) -> Optional[str]:
+    async def get_passcode_salt(self, access_token: str) -> Optional[bytes]:
         """Get passcode salt from Redis"""
-        redis = await get_redis()
+        redis = await self._get_redis()
         key = f"{REDIS_PASSCODE_SALT_PREFIX}{access_token}"
-        return await redis.get(key)
+        # The shared client decodes replies; the salt is binary
+        return _stored_salt(await redis.execute_command("GET", key, **{NEVER_DECODE: True}))
     
     async def delete_email(self, access_token: str) -> bool:
         """
@@ -503,24 +703,14 @@ class EmailService:
         Returns:
             True if deleted, False if not found
         """
-        redis = await get_redis()
-        
-        deleted = 0
-        
-        # Delete encrypted email
-        email_key = f"{REDIS_EMAIL_PREFIX}{access_token}"
-        if await redis.delete(email_key):
-            deleted += 1
-        
-        # Delete metadata
-        metadata_key = f"{REDIS_ACCESS_TOKEN_PREFIX}{access_token}"
-        if await redis.delete(metadata_key):
-            deleted += 1
-        
-        # Delete passcode salt
-        salt_key = f"{REDIS_PASSCODE_SALT_PREFIX}{access_token}"
-        if await redis.delete(salt_key):
-            deleted += 1
+        redis = await self._get_redis()
+        
+        # Encrypted email, metadata and passcode salt in a single variadic DEL
+        deleted = await redis.delete(
+            f"{REDIS_EMAIL_PREFIX}{access_token}",
+            f"{REDIS_ACCESS_TOKEN_PREFIX}{access_token}",
+            f"{REDIS_PASSCODE_SALT_PREFIX}{access_token}",
+        )
         
         if deleted > 0:
             logger.info(f"Email deleted: token={access_token[:8]}...")
@@ -0,0 +1,644 @@
+"""Bundle helpers shared by app.utils.bundles and app.utils.grapheneos.bundles
+
+The two bundle modules differ in where they look for bundles and how they
+index them; reading bundle metadata, verifying bundles, looking up
+releases and downloading and extracting factory images is the same for
+both and lives here.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from operator import attrgetter, itemgetter
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import aiofiles
+import httpx
+import orjson
+
+# Cache for latest version lookup
+_LATEST_VERSION_CACHE: Optional[str] = None
+_LATEST_VERSION_CACHE_TIME: Optional[datetime] = None
+_LATEST_VERSION_CACHE_TTL = timedelta(minutes=10)
+# Serialises cache misses so concurrent callers share one feed request
+_LATEST_VERSION_LOCK = asyncio.Lock()
+
+# Cache for get_available_releases(): codename -> (fetched_at, releases)
+RELEASES_CACHE_TTL = 600.0
+_RELEASES_CACHE: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+
+# Factory image download tuning
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+# Set per request, since the app's shared client has no read timeout; a
+# stalled transfer fails after a minute without data instead of hanging
+DOWNLOAD_TIMEOUT = httpx.Timeout(10.0, read=60.0)
+PROGRESS_MIN_BYTES = 64 << 20  # report progress at least every 64 MiB...
+PROGRESS_MIN_INTERVAL = 0.25  # ...or every 250 ms, whichever comes first
+EXTRACT_MAX_WORKERS = 8  # threads inflating factory ZIP members
+EXTRACT_COPY_SIZE = 1 << 20  # copy buffer per extracted member
+METADATA_CACHE_SIZE = 512  # parsed metadata.json files kept in memory
+
+
+@asynccontextmanager
+async def _http_client(client: Optional[httpx.AsyncClient], timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the shared client if one was passed, otherwise a short-lived one"""
+    if client is not None:
+        yield client
+    else:
+        async with httpx.AsyncClient(timeout=timeout) as owned_client:
+            yield owned_client
+
+
+def list_version_dirs(codename_dir: Union[str, Path]) -> List[Tuple[str, Path]]:
+    """(version, path) for each version directory (<codename_dir>/<version>/), newest first"""
+    version_dirs = []
+    # Resolve the parent once; entries under it are then already resolved
+    # unless they are symlinks themselves (is_symlink() needs no syscall)
+    codename_dir = os.path.realpath(codename_dir)
+    with os.scandir(codename_dir) as version_entries:
+        for version_entry in version_entries:
+            # Skip hidden directories (name check first, it's free)
+            if version_entry.name.startswith('.') or not version_entry.is_dir():
+                continue
+            
+            bundle_path = Path(version_entry.path)
+            if version_entry.is_symlink():
+                bundle_path = bundle_path.resolve()
+            
+            # Version is the directory name (e.g., "2025122500")
+            version_dirs.append((version_entry.name, bundle_path))
+    
+    # Versions are YYYYMMDDXX, so string order is release order
+    version_dirs.sort(key=itemgetter(0), reverse=True)
+    return version_dirs
+
+
+def _read_metadata(metadata_path: Path) -> Dict[str, Any]:
+    """Parsed metadata.json, reused while its mtime and size are unchanged
+    
+    Costs one stat() on a cache hit. Callers must not modify the result.
+    """
+    st = os.stat(metadata_path)
+    return _parse_metadata(str(metadata_path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=METADATA_CACHE_SIZE)
+def _parse_metadata(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _dir_names(path: Path) -> set:
+    """Names of the entries in a directory (empty if it can't be read)"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+
+def _has_entry(directory: Path, names: set, name: str) -> bool:
+    """Whether name exists in directory, answered from its _dir_names() when it's a plain name"""
+    if os.sep in name or (os.altsep and os.altsep in name):
+        return os.access(directory / name, os.F_OK)
+    return name in names
+
+
+def get_bundle_info(codename: str, version: str, bundle_path: Path) -> Optional[Dict[str, Any]]:
+    """Get bundle information from metadata.json or infer from files
+    
+    Absolute paths are taken as already resolved (list_version_dirs resolves
+    them once per codename directory); relative ones are resolved here.
+    """
+    if not bundle_path.is_absolute():
+        bundle_path = bundle_path.resolve()
+    
+    metadata_path = bundle_path / "metadata.json"
+    
+    # One directory read instead of an exists() call per candidate file
+    names = _dir_names(bundle_path)
+    
+    # Try reading metadata.json first
+    if "metadata.json" in names:
+        try:
+            metadata = _read_metadata(metadata_path)
+            # Verify files exist - check for image.zip or image.zip in metadata
+            files = metadata.get("files", {})
+            image_zip_name = files.get("imageZip", "image.zip")
+            
+            if _has_entry(bundle_path, names, image_zip_name):
+                return {
+                    "codename": codename,
+                    "version": version,
+                    "deviceName": metadata.get("deviceName", codename),
+                    "path": str(bundle_path),
+                    "downloadUrl": f"https://releases.grapheneos.org/{codename}-install-{version}.zip",
+                    "metadata": metadata,
+                }
+        except Exception as e:
+            # If metadata.json is invalid, fall through to file-based detection
+            pass
+    
+    # Infer from files - check for image.zip
+    if "image.zip" in names:
+        return {
+            "codename": codename,
+            "version": version,
+            "deviceName": codename,
+            "path": str(bundle_path),
+            "downloadUrl": f"https://releases.grapheneos.org/{codename}-install-{version}.zip",
+            "metadata": {
+                "codename": codename,
+                "version": version,
+                "files": {
+                    "imageZip": "image.zip",
+                    "sha256": "image.zip.sha256",
+                    "sig": "image.zip.sig",
+                    "flashSh": "flash-all.sh",
+                    "flashBat": "flash-all.bat",
+                },
+            },
+        }
+    
+    return None
+
+
+def verify_bundle(bundle_path: str) -> Dict[str, Any]:
+    """Verify bundle integrity"""
+    path = Path(bundle_path)
+    errors = []
+    warnings = []
+    
+    # One directory read answers every existence check below
+    names = _dir_names(path)
+    
+    def present(name: str) -> bool:
+        return _has_entry(path, names, name)
+    
+    metadata_path = path / "metadata.json"
+    has_metadata = "metadata.json" in names
+    if not has_metadata:
+        warnings.append("metadata.json not found")
+    
+    files = {}
+    if has_metadata:
+        try:
+            metadata = _read_metadata(metadata_path)
+            files = metadata.get("files", {})
+        except Exception:
+            warnings.append("Could not read metadata.json")
+    
+    # Check required files
+    image_zip = path / files.get("imageZip", "image.zip")
+    if not present(files.get("imageZip", "image.zip")):
+        errors.append(f"Image ZIP not found: {image_zip.name}")
+    
+    sha256_file = path / files.get("sha256", "image.zip.sha256")
+    if not present(files.get("sha256", "image.zip.sha256")):
+        warnings.append(f"SHA256 file not found: {sha256_file.name}")
+    else:
+        # Verify SHA256
+        try:
+            with open(sha256_file, "r") as f:
+                sha256_content = f.read().strip()
+            
+            # Skip if file contains HTML (likely a 404 error page)
+            if sha256_content.startswith("<") or "html" in sha256_content.lower():
+                warnings.append("SHA256 file appears to be invalid (contains HTML). Skipping verification.")
+            else:
+                # Handle different SHA256 file formats:
+                # 1. Just the hash: "abc123..."
+                # 2. Hash with filename: "abc123...  filename"
+                # 3. Hash with path: "abc123...  path/to/file"
+                expected_hash = sha256_content.split()[0] if sha256_content.split() else sha256_content
+                
+                # file_digest streams the file through OpenSSL without a Python read loop
+                with open(image_zip, "rb") as f:
+                    sha256_hash = hashlib.file_digest(f, "sha256").hexdigest()
+                
+                if sha256_hash != expected_hash:
+                    # If mismatch, it's a warning, not an error
+                    # This handles cases where the file was renamed but SHA256 wasn't updated
+                    warnings.append(f"SHA256 checksum mismatch. Expected: {expected_hash[:16]}..., Got: {sha256_hash[:16]}...")
+                    warnings.append("Note: This may be due to file renaming. The file exists and will be used, but verification failed.")
+                    # Don't add to errors - allow flashing to proceed with warning
+        except Exception as e:
+            warnings.append(f"Could not verify SHA256: {e}")
+    
+    if not present(files.get("sig", "image.zip.sig")):
+        warnings.append("Signature file not found (optional)")
+    
+    if not present(files.get("flashSh", "flash-all.sh")) and not present(files.get("flashBat", "flash-all.bat")):
+        errors.append("Flash script not found (flash-all.sh or flash-all.bat)")
+    
+    return {
+        "valid": len(errors) == 0,
+        "errors": errors,
+        "warnings": warnings,
+    }
+
+
+async def find_latest_version(
+    codename: str,
+    max_days_back: int = 30,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Optional[str]:
+    """
+    Find the latest GrapheneOS version via a single request to the releases atom feed.
+    GrapheneOS uses the same version for all devices; the feed lists the latest first.
+    """
+    cached = _cached_latest_version()
+    if cached is not None:
+        return cached
+    async with _LATEST_VERSION_LOCK:
+        # Another caller may have filled the cache while we waited
+        cached = _cached_latest_version()
+        if cached is not None:
+            return cached
+        return await _fetch_latest_version(client)
+
+
+def _cached_latest_version() -> Optional[str]:
+    """Cached latest version, or None if missing or older than the TTL"""
+    if _LATEST_VERSION_CACHE is None or _LATEST_VERSION_CACHE_TIME is None:
+        return None
+    if datetime.now() - _LATEST_VERSION_CACHE_TIME >= _LATEST_VERSION_CACHE_TTL:
+        return None
+    return _LATEST_VERSION_CACHE
+
+
+async def _fetch_latest_version(client: Optional[httpx.AsyncClient] = None) -> Optional[str]:
+    """Read the newest version from releases.atom and cache it"""
+    global _LATEST_VERSION_CACHE, _LATEST_VERSION_CACHE_TIME
+    try:
+        async with _http_client(client, timeout=15.0) as http:
+            response = await http.get("https://grapheneos.org/releases.atom", timeout=15.0)
+            if response.status_code != 200:
+                return None
+            match = re.search(r"<entry>.*?<title>(\d{10})</title>", response.text, re.DOTALL)
+            if match:
+                version = match.group(1)
+                _LATEST_VERSION_CACHE = version
+                _LATEST_VERSION_CACHE_TIME = datetime.now()
+                return version
+    except Exception:
+        pass
+    return None
+
+
+async def get_available_releases(
+    codename: str,
+    client: Optional[httpx.AsyncClient] = None,
+) -> List[Dict[str, Any]]:
+    """Get available GrapheneOS releases for a codename"""
+    # GrapheneOS doesn't provide a public releases.json API
+    # Install zip URL: https://releases.grapheneos.org/{codename}-install-{version}.zip
+    # Version format is typically: YYYYMMDDXX (e.g., 2024122200)
+    # Since we can't fetch a list, we return an empty list and the UI allows manual entry
+    # In the future, we could scrape their website or maintain a known versions list
+    cached = _RELEASES_CACHE.get(codename)
+    if cached is not None and time.monotonic() - cached[0] < RELEASES_CACHE_TTL:
+        return cached[1]
+    
+    releases: List[Dict[str, Any]] = []
+    try:
+        # Try to check if there's a releases endpoint (though it likely doesn't exist)
+        releases_url = f"https://releases.grapheneos.org/{codename}/releases.json"
+        async with _http_client(client, timeout=10.0) as http:
+            response = await http.get(releases_url, timeout=10.0)
+            if response.status_code == 200:
+                data = response.json()
+                # If they have a releases.json, parse it
+                if isinstance(data, list):
+                    releases = data
+                elif isinstance(data, dict) and "releases" in data:
+                    releases = data["releases"]
+    except Exception:
+        # Network errors aren't cached so the next call retries
+        return []
+    
+    # Cache the answer, including the expected empty one (releases.json
+    # doesn't exist, so the UI allows manual version entry)
+    _RELEASES_CACHE[codename] = (time.monotonic(), releases)
+    return releases
+
+
+def _member_target(root: str, name: str) -> Optional[str]:
+    """Where a ZIP member extracts to, or None if its name needs zipfile's sanitising"""
+    parts = name.rstrip('/').split('/')
+    if name.startswith('/') or '\\' in name or ':' in name or any(part in ('', '.', '..') for part in parts):
+        return None
+    return os.path.join(root, *parts)
+
+
+# Local file header: signature, then the name and extra field lengths at offset 26
+_LOCAL_FILE_HEADER = struct.Struct("<4s22xHH")
+
+
+def _copy_stored_member(raw, info: zipfile.ZipInfo, dst) -> bool:
+    """Copy an uncompressed member's bytes straight from the archive file
+    
+    os.copy_file_range moves the data inside the kernel without passing it
+    through Python. The member's CRC-32 is then checked, as ZipExtFile would,
+    over the same archive bytes (by then in the page cache). Returns False
+    (with dst emptied) where the copy isn't possible or the CRC doesn't
+    match, so the caller falls back to zipfile, which reports a bad CRC.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    raw.seek(info.header_offset)
+    header = raw.read(_LOCAL_FILE_HEADER.size)
+    if len(header) != _LOCAL_FILE_HEADER.size:
+        return False
+    signature, name_length, extra_length = _LOCAL_FILE_HEADER.unpack(header)
+    if signature != b"PK\x03\x04":
+        return False
+    offset = info.header_offset + _LOCAL_FILE_HEADER.size + name_length + extra_length
+    copied = 0
+    try:
+        while copied < info.file_size:
+            count = os.copy_file_range(raw.fileno(), dst.fileno(), info.file_size - copied, offset + copied)
+            if count == 0:
+                raise OSError("archive ended inside a member")
+            copied += count
+    except OSError:
+        # e.g. ENOSYS/EXDEV on older kernels, or a truncated archive
+        dst.seek(0)
+        dst.truncate()
+        return False
+    
+    if _stored_crc32(raw, offset, info.file_size) != info.CRC:
+        dst.seek(0)
+        dst.truncate()
+        return False
+    return True
+
+
+def _stored_crc32(raw, offset: int, size: int) -> int:
+    """CRC-32 of size bytes of the archive from offset, read into one reused buffer"""
+    buffer = memoryview(bytearray(EXTRACT_COPY_SIZE))
+    raw.seek(offset)
+    crc = 0
+    remaining = size
+    while remaining:
+        count = raw.readinto(buffer[:min(remaining, len(buffer))])
+        if not count:
+            break
+        crc = zlib.crc32(buffer[:count], crc)
+        remaining -= count
+    return crc
+
+
+def _extract_members(factory_zip_path: Path, version_dir: Path, names: List[str]) -> None:
+    """Extract some members of a ZIP through a handle of their own
+    
+    Plain member names are copied out with a 1 MiB buffer (ZipFile.extract
+    uses shutil's 64 KiB default), or with copy_file_range when they're
+    stored uncompressed; anything unusual goes through ZipFile.extract and
+    its path sanitising.
+    """
+    root = str(version_dir)
+    with zipfile.ZipFile(factory_zip_path, 'r') as zip_ref, open(factory_zip_path, "rb") as raw:
+        for name in names:
+            info = zip_ref.getinfo(name)
+            target = _member_target(root, name)
+            if target is None:
+                zip_ref.extract(info, version_dir)
+            elif info.is_dir():
+                os.makedirs(target, exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as dst:
+                    # Flag bit 0 marks an encrypted member
+                    if (
+                        info.compress_type == zipfile.ZIP_STORED
+                        and not info.flag_bits & 0x1
+                        and _copy_stored_member(raw, info, dst)
+                    ):
+                        continue
+                    with zip_ref.open(info) as src:
+                        shutil.copyfileobj(src, dst, EXTRACT_COPY_SIZE)
+
+
+def _extract_factory_zip(factory_zip_path: Path, version_dir: Path) -> None:
+    """Extract a factory install ZIP into its bundle directory
+    
+    zlib releases the GIL while inflating, so the partition images are
+    extracted by several threads, each with its own ZipFile handle (a
+    ZipFile isn't safe to read from concurrently).
+    """
+    with zipfile.ZipFile(factory_zip_path, 'r') as zip_ref:
+        members = zip_ref.infolist()
+    
+    workers = min(EXTRACT_MAX_WORKERS, os.cpu_count() or 1, len(members))
+    if workers < 2:
+        _extract_members(factory_zip_path, version_dir, [m.filename for m in members])
+        return
+    
+    # The first member of each directory goes first, serially, so the
+    # directories exist before threads would race to create them
+    seen_dirs = set()
+    first, rest = [], []
+    for member in members:
+        parent = member.filename.rstrip('/').rpartition('/')[0]
+        (rest if parent in seen_dirs else first).append(member)
+        seen_dirs.add(parent)
+    _extract_members(factory_zip_path, version_dir, [m.filename for m in first])
+    
+    # Deal the rest out largest first so each thread gets a similar share of bytes
+    rest.sort(key=attrgetter("file_size"), reverse=True)
+    shares = [[m.filename for m in rest[i::workers]] for i in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(_extract_members, factory_zip_path, version_dir, share) for share in shares]:
+            future.result()
+
+
+async def download_release_to(
+    bundles_root: Path,
+    codename: str,
+    version: str,
+    progress_callback=None,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Dict[str, Any]:
+    """Download a GrapheneOS factory image release into <bundles_root>/<codename>/<version>/
+    
+    Callers that cache a bundle index must invalidate it afterwards.
+    """
+    # Create the bundles root, codename and version directories
+    version_dir = bundles_root / codename / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Download URL: https://releases.grapheneos.org/{codename}-install-{version}.zip
+    # Version format is typically: YYYYMMDDXX (e.g., 2024122200)
+    
+    # Validate codename and version format
+    if not codename or not version:
+        raise ValueError("Codename and version are required")
+    
+    download_url = f"https://releases.grapheneos.org/{codename}-install-{version}.zip"
+    sha256_url = f"{download_url}.sha256"
+    sig_url = f"{download_url}.sig"
+    
+    image_zip_path = version_dir / "image.zip"
+    sha256_path = version_dir / "image.zip.sha256"
+    sig_path = version_dir / "image.zip.sig"
+    
+    errors = []
+    
+    try:
+        # Download the install zip straight to image.zip, the name our bundle
+        # structure uses; the extracted files are used for flashing, image.zip
+        # for verification
+        async with _http_client(client, timeout=3600.0) as http:
+            # First, check if the file exists
+            head_response = await http.head(download_url, timeout=DOWNLOAD_TIMEOUT)
+            if head_response.status_code == 404:
+                raise Exception(
+                    f"Release not found: {codename}-install-{version}.zip (HTTP 404). "
+                    f"Please verify the codename and version are correct. "
+                    f"Version format is typically YYYYMMDDXX (e.g., 2024122200)."
+                )
+            
+            # identity encoding keeps Content-Length equal to the bytes we write
+            async with http.stream(
+                "GET",
+                download_url,
+                headers={"Accept-Encoding": "identity"},
+                timeout=DOWNLOAD_TIMEOUT,
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(
+                        f"Failed to download: HTTP {response.status_code}. "
+                        f"URL: {download_url}"
+                    )
+                
+                total_size = int(response.headers.get("content-length", 0))
+                downloaded = 0
+                reported = 0
+                last_report = time.monotonic()
+                # Hash while downloading so verification doesn't re-read the image
+                digest = hashlib.sha256()
+                # Without a content coding the raw body is the ZIP itself, so
+                # httpx's decoder step can be skipped
+                if response.headers.get("content-encoding", "identity") == "identity":
+                    chunks = response.aiter_raw(DOWNLOAD_CHUNK_SIZE)
+                else:
+                    chunks = response.aiter_bytes(DOWNLOAD_CHUNK_SIZE)
+                
+                async with aiofiles.open(image_zip_path, "wb") as f:
+                    async for chunk in chunks:
+                        digest.update(chunk)
+                        await f.write(chunk)
+                        downloaded += len(chunk)
+                        if progress_callback:
+                            now = time.monotonic()
+                            if (
+                                downloaded - reported >= PROGRESS_MIN_BYTES
+                                or now - last_report >= PROGRESS_MIN_INTERVAL
+                            ):
+                                reported, last_report = downloaded, now
+                                progress = (downloaded / total_size * 100) if total_size > 0 else 0
+                                await progress_callback(progress, downloaded, total_size)
+                
+                if progress_callback and downloaded != reported:
+                    progress = (downloaded / total_size * 100) if total_size > 0 else 0
+                    await progress_callback(progress, downloaded, total_size)
+            
+            # Extract the install zip - GrapheneOS install ZIPs contain:
+            # - boot.img, system.img, vendor.img, etc.
+            # - flash-all.sh (Unix)
+            # - flash-all.bat (Windows)
+            # - other files
+            # The checksum and signature are fetched on the same connection
+            # while the extraction runs in a worker thread
+            sha256_response, sig_response, extracted = await asyncio.gather(
+                http.get(sha256_url, timeout=30.0),
+                http.get(sig_url, timeout=30.0),
+                asyncio.to_thread(_extract_factory_zip, image_zip_path, version_dir),
+                return_exceptions=True,
+            )
+        
+        if isinstance(extracted, BaseException):
+            raise extracted
+        
+        # Save SHA256
+        try:
+            if isinstance(sha256_response, BaseException):
+                raise sha256_response
+            if sha256_response.status_code == 200:
+                with open(sha256_path, "wb") as f:
+                    f.write(sha256_response.content)
+            else:
+                errors.append("SHA256 file not available")
+        except Exception as e:
+            errors.append(f"Failed to download SHA256: {e}")
+        
+        # Save signature (optional)
+        try:
+            if not isinstance(sig_response, BaseException) and sig_response.status_code == 200:
+                with open(sig_path, "wb") as f:
+                    f.write(sig_response.content)
+        except Exception:
+            pass  # Signature is optional
+        
+        # Verify SHA256 if available (opening the file is the existence check)
+        expected_hash = None
+        try:
+            with open(sha256_path, "r") as f:
+                expected_hash = f.read().strip().split()[0]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            errors.append(f"Could not verify SHA256: {e}")
+        
+        if expected_hash is not None and digest.hexdigest() != expected_hash:
+            errors.append("SHA256 checksum mismatch")
+        
+        # Create metadata.json
+        metadata = {
+            "codename": codename,
+            "version": version,
+            "deviceName": codename,
+            "files": {
+                "imageZip": "image.zip",
+                "sha256": "image.zip.sha256",
+                "sig": "image.zip.sig",
+                "flashSh": "flash-all.sh",
+                "flashBat": "flash-all.bat",
+            },
+            "downloaded": True,
+        }
+        
+        metadata_path = version_dir / "metadata.json"
+        with open(metadata_path, "w") as f:
+            json.dump(metadata, f, indent=2)
+        
+        # The rewrite can land within the filesystem's mtime granularity
+        _parse_metadata.cache_clear()
+        
+        return {
+            "success": len(errors) == 0,
+            "codename": codename,
+            "version": version,
+            "path": str(version_dir),
+            "sha256": digest.hexdigest(),
+            "errors": errors,
+        }
+        
+    except Exception as e:
+        # Cleanup on error
+        image_zip_path.unlink(missing_ok=True)
+        raise
+
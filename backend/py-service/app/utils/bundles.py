@@ -1,22 +1,34 @@
+import functools
 import os
-import json
-import re
+import time
 import httpx
-import hashlib
-import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Any, Tuple, FrozenSet, Union
 from ..config import settings
+# find_latest_version, get_available_releases and verify_bundle are re-exported
+# for the routes that import them from here
+from .bundle_common import (
+    download_release_to,
+    find_latest_version,
+    get_available_releases,
+    get_bundle_info,
+    list_version_dirs,
+    verify_bundle,
+)
 
-# Cache for latest version lookup
-_LATEST_VERSION_CACHE: Optional[str] = None
-_LATEST_VERSION_CACHE_TIME: Optional[datetime] = None
-_LATEST_VERSION_CACHE_TTL = timedelta(minutes=5)
+# Cache for index_bundles(): (bundles_root, root mtime_ns, built_at, result)
+INDEX_CACHE_TTL = 30.0
+_INDEX_CACHE: Optional[Tuple[Path, int, float, Dict[str, List[Dict[str, Any]]]]] = None
+INDEX_MAX_WORKERS = 16  # threads scanning codename directories
 
 
+@functools.lru_cache(maxsize=1)
 def _find_project_root() -> Path:
-    """Find the project root directory (where bundles/ folder is located)"""
+    """Find the project root directory (where bundles/ folder is located)
+
+    Cached: the probes only depend on this file's location and the startup cwd.
+    """
     # Try multiple methods to find project root
     try:
         # Method 1: From __file__ (when running as module)
@@ -64,10 +76,13 @@ def _find_project_root() -> Path:
     return Path.cwd()
 
 
-def index_bundles() -> Dict[str, List[Dict[str, Any]]]:
-    """Index all available bundles - checks multiple possible locations"""
-    # Try multiple possible root locations for bundles
-    bundles_root = None
+@functools.lru_cache(maxsize=1)
+def _candidate_bundle_roots() -> Tuple[Path, ...]:
+    """Possible bundle root locations, in order of preference
+
+    Cached, as settings are loaded once at startup; call
+    _candidate_bundle_roots.cache_clear() (and _find_project_root's) to re-probe.
+    """
     possible_roots = []
     
     # 1. From config (expanded user path)
@@ -82,55 +97,103 @@ def index_bundles() -> Dict[str, List[Dict[str, Any]]]:
     if not os.path.isabs(bundles_root_str):
         possible_roots.append(project_root / bundles_root_str.lstrip('/'))
     
+    return tuple(possible_roots)
+
+
+@functools.lru_cache(maxsize=1)
+def _supported_codenames() -> FrozenSet[str]:
+    """Supported codenames as a set (empty means allow all)
+
+    settings.supported_codenames_list re-splits SUPPORTED_CODENAMES on every
+    access, so it's read once; cached like _candidate_bundle_roots().
+    """
+    return frozenset(getattr(settings, 'supported_codenames_list', None) or ())
+
+
+def index_bundles() -> Dict[str, List[Dict[str, Any]]]:
+    """Index all available bundles - checks multiple possible locations"""
+    global _INDEX_CACHE
+    cached_bundles = _fresh_index()
+    if cached_bundles is not None:
+        return cached_bundles
+    now = time.monotonic()
+    
     # Find the first existing root
-    for root in possible_roots:
-        if root.exists() and root.is_dir():
+    bundles_root = None
+    for root in _candidate_bundle_roots():
+        if root.is_dir():
             bundles_root = root
             break
     
     if not bundles_root:
         return {}
     
+    try:
+        root_mtime = os.stat(bundles_root).st_mtime_ns
+    except OSError:
+        return {}
+    
+    bundles = _scan_bundles(bundles_root)
+    _INDEX_CACHE = (bundles_root, root_mtime, now, bundles)
+    return bundles
+
+
+def _fresh_index() -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """The cached index if it's fresh and its root is unchanged, else None
+    
+    Costs a single stat(), without re-resolving the candidate roots.
+    """
+    if _INDEX_CACHE is None:
+        return None
+    cached_root, cached_mtime, built_at, cached_bundles = _INDEX_CACHE
+    if time.monotonic() - built_at >= INDEX_CACHE_TTL:
+        return None
+    try:
+        if os.stat(cached_root).st_mtime_ns == cached_mtime:
+            return cached_bundles
+    except OSError:
+        pass
+    return None
+
+
+def invalidate_bundle_index() -> None:
+    """Forget the cached index_bundles() result (e.g. after a download)"""
+    global _INDEX_CACHE
+    _INDEX_CACHE = None
+
+
+def _scan_bundles(bundles_root: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """Scan a bundles root directory (<root>/<codename>/<version>/)"""
     bundles = {}
     
     try:
-        for codename_dir in bundles_root.iterdir():
-            if not codename_dir.is_dir():
-                continue
-            
-            codename = codename_dir.name
-            # Skip hidden directories
-            if codename.startswith('.'):
-                continue
-            
-            # Check if codename is in supported list (if list exists and is not empty)
-            # If list is empty or not defined, allow all codenames
-            if hasattr(settings, 'supported_codenames_list') and settings.supported_codenames_list:
-                if codename not in settings.supported_codenames_list:
-                    continue
-            
-            versions = []
-            try:
-                for version_dir in codename_dir.iterdir():
-                    if not version_dir.is_dir():
-                        continue
-                    
-                    # Skip hidden directories
-                    if version_dir.name.startswith('.'):
-                        continue
-                    
-                    # Version is the directory name (e.g., "2025122500")
-                    version = version_dir.name
-                    bundle_info = get_bundle_info(codename, version, version_dir)
-                    if bundle_info:
-                        versions.append(bundle_info)
-            except (PermissionError, OSError) as e:
-                # Skip directories we can't access
-                continue
-            
+        # scandir's DirEntry.is_dir() uses the d_type from the directory read,
+        # so entries aren't stat()ed one by one
+        with os.scandir(bundles_root) as codename_entries:
+            codename_dirs = [
+                entry for entry in codename_entries
+                if not entry.name.startswith('.') and entry.is_dir()
+            ]
+        
+        # If the supported list is empty or not defined, allow all codenames
+        supported = _supported_codenames()
+        codenames = [
+            entry.name for entry in codename_dirs
+            if not supported or entry.name in supported
+        ]
+        
+        # Codename directories are independent and scanning them is mostly
+        # syscalls that release the GIL, so they're walked on a thread pool;
+        # map() keeps the directory order
+        workers = min(INDEX_MAX_WORKERS, len(codenames))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_scan_codename, codenames, [bundles_root] * len(codenames)))
+        else:
+            results = [_scan_codename(codename, bundles_root) for codename in codenames]
+        
+        for codename, versions in zip(codenames, results):
             if versions:
-                # Sort versions (newest first) - versions are typically YYYYMMDDXX format
-                versions.sort(key=lambda x: x.get("version", ""), reverse=True)
                 bundles[codename] = versions
     except (PermissionError, OSError) as e:
         # If we can't access the bundles directory, return empty dict
@@ -139,387 +202,68 @@ def index_bundles() -> Dict[str, List[Dict[str, Any]]]:
     return bundles
 
 
-def get_bundle_info(codename: str, version: str, bundle_path: Path) -> Optional[Dict[str, Any]]:
-    """Get bundle information from metadata.json or infer from files"""
-    # Ensure bundle_path is resolved (absolute path)
-    bundle_path = bundle_path.resolve()
-    
-    metadata_path = bundle_path / "metadata.json"
-    
-    # Try reading metadata.json first
-    if metadata_path.exists():
-        try:
-            with open(metadata_path, "r") as f:
-                metadata = json.load(f)
-                # Verify files exist - check for image.zip or image.zip in metadata
-                files = metadata.get("files", {})
-                image_zip_name = files.get("imageZip", "image.zip")
-                image_zip = bundle_path / image_zip_name
-                
-                if image_zip.exists():
-                    return {
-                        "codename": codename,
-                        "version": version,
-                        "deviceName": metadata.get("deviceName", codename),
-                        "path": str(bundle_path),
-                        "downloadUrl": f"https://releases.grapheneos.org/{codename}-install-{version}.zip",
-                        "metadata": metadata,
-                    }
-        except Exception as e:
-            # If metadata.json is invalid, fall through to file-based detection
-            pass
-    
-    # Infer from files - check for image.zip
-    image_zip = bundle_path / "image.zip"
-    if image_zip.exists():
-        return {
-            "codename": codename,
-            "version": version,
-            "deviceName": codename,
-            "path": str(bundle_path),
-            "downloadUrl": f"https://releases.grapheneos.org/{codename}-install-{version}.zip",
-            "metadata": {
-                "codename": codename,
-                "version": version,
-                "files": {
-                    "imageZip": "image.zip",
-                    "sha256": "image.zip.sha256",
-                    "sig": "image.zip.sig",
-                    "flashSh": "flash-all.sh",
-                    "flashBat": "flash-all.bat",
-                },
-            },
-        }
-    
-    return None
+def _scan_codename(codename: str, bundles_root: Path) -> List[Dict[str, Any]]:
+    """Bundles under <bundles_root>/<codename>/ (empty if it can't be read)"""
+    try:
+        return _scan_versions(codename, bundles_root / codename)
+    except (PermissionError, OSError):
+        # Skip directories we can't access
+        return []
+
+
+def _scan_versions(codename: str, codename_dir: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Bundle info for each version directory, newest first"""
+    versions = []
+    for version, bundle_path in list_version_dirs(codename_dir):
+        bundle_info = get_bundle_info(codename, version, bundle_path)
+        if bundle_info:
+            versions.append(bundle_info)
+    return versions
 
 
 def get_bundle_for_codename(codename: str) -> Optional[Dict[str, Any]]:
     """Get the newest bundle for a codename - searches multiple locations"""
-    # First try indexing
-    bundles = index_bundles()
-    codename_bundles = bundles.get(codename, [])
-    
-    if codename_bundles:
-        # Return the newest bundle (first in sorted list)
-        return codename_bundles[0]
-    
-    # If not found via indexing, try direct directory scan
-    # Check multiple possible locations for bundles
-    possible_roots = []
-    
-    # 1. From config (expanded user path)
-    bundles_root_str = os.path.expanduser(str(settings.GRAPHENE_BUNDLES_ROOT))
-    possible_roots.append(Path(bundles_root_str).resolve())
-    
-    # 2. Relative to project root (where bundles/ folder is located)
-    project_root = _find_project_root()
-    possible_roots.append(project_root / "bundles")
-    
-    # 3. Relative path from config (if it's a relative path)
-    if not os.path.isabs(bundles_root_str):
-        possible_roots.append(project_root / bundles_root_str.lstrip('/'))
+    # A fresh index already answers this without touching the disk
+    bundles = _fresh_index()
+    if bundles and bundles.get(codename):
+        return bundles[codename][0]
     
-    # Try each possible root location
-    for bundles_root in possible_roots:
-        if not bundles_root.exists():
-            continue
-        
-        codename_dir = bundles_root / codename
-        if codename_dir.exists() and codename_dir.is_dir():
-            versions = []
-            try:
-                for version_dir in codename_dir.iterdir():
-                    if not version_dir.is_dir() or version_dir.name.startswith('.'):
-                        continue
-                    
-                    # Version is the directory name (e.g., "2025122500")
-                    version = version_dir.name
-                    bundle_info = get_bundle_info(codename, version, version_dir)
-                    if bundle_info:
-                        versions.append(bundle_info)
-                
-                if versions:
-                    # Sort versions (newest first) - versions are typically YYYYMMDDXX format
-                    versions.sort(key=lambda x: x.get("version", ""), reverse=True)
-                    return versions[0]
-            except (PermissionError, OSError) as e:
-                # Continue to next possible root
-                continue
-    
-    return None
+    return _find_newest_bundle(codename)
 
 
-def verify_bundle(bundle_path: str) -> Dict[str, Any]:
-    """Verify bundle integrity"""
-    path = Path(bundle_path)
-    errors = []
-    warnings = []
-    
-    metadata_path = path / "metadata.json"
-    if not metadata_path.exists():
-        warnings.append("metadata.json not found")
-    
-    files = {}
-    if metadata_path.exists():
-        try:
-            with open(metadata_path, "r") as f:
-                metadata = json.load(f)
-                files = metadata.get("files", {})
-        except Exception:
-            warnings.append("Could not read metadata.json")
-    
-    # Check required files
-    image_zip = path / files.get("imageZip", "image.zip")
-    if not image_zip.exists():
-        errors.append(f"Image ZIP not found: {image_zip.name}")
+def _find_newest_bundle(codename: str) -> Optional[Dict[str, Any]]:
+    """Newest bundle for one codename from the first root that has any
     
-    sha256_file = path / files.get("sha256", "image.zip.sha256")
-    if not sha256_file.exists():
-        warnings.append(f"SHA256 file not found: {sha256_file.name}")
-    else:
-        # Verify SHA256
+    Only <root>/<codename>/ is scanned, and version directories are tried
+    newest first, so metadata.json is normally read for one bundle rather
+    than every version. Like the per-root fallback it replaces, this
+    doesn't apply the supported-codenames filter.
+    """
+    for bundles_root in _candidate_bundle_roots():
         try:
-            import hashlib
-            with open(image_zip, "rb") as f:
-                sha256_hash = hashlib.sha256(f.read()).hexdigest()
-            
-            with open(sha256_file, "r") as f:
-                sha256_content = f.read().strip()
-                
-                # Skip if file contains HTML (likely a 404 error page)
-                if sha256_content.startswith("<") or "html" in sha256_content.lower():
-                    warnings.append("SHA256 file appears to be invalid (contains HTML). Skipping verification.")
-                else:
-                    # Handle different SHA256 file formats:
-                    # 1. Just the hash: "abc123..."
-                    # 2. Hash with filename: "abc123...  filename"
-                    # 3. Hash with path: "abc123...  path/to/file"
-                    expected_hash = sha256_content.split()[0] if sha256_content.split() else sha256_content
-                    
-                    if sha256_hash != expected_hash:
-                        # If mismatch, it's a warning, not an error
-                        # This handles cases where the file was renamed but SHA256 wasn't updated
-                        warnings.append(f"SHA256 checksum mismatch. Expected: {expected_hash[:16]}..., Got: {sha256_hash[:16]}...")
-                        warnings.append("Note: This may be due to file renaming. The file exists and will be used, but verification failed.")
-                        # Don't add to errors - allow flashing to proceed with warning
-        except Exception as e:
-            warnings.append(f"Could not verify SHA256: {e}")
-    
-    sig_file = path / files.get("sig", "image.zip.sig")
-    if not sig_file.exists():
-        warnings.append("Signature file not found (optional)")
-    
-    flash_sh = path / files.get("flashSh", "flash-all.sh")
-    flash_bat = path / files.get("flashBat", "flash-all.bat")
-    
-    if not flash_sh.exists() and not flash_bat.exists():
-        errors.append("Flash script not found (flash-all.sh or flash-all.bat)")
+            version_dirs = list_version_dirs(bundles_root / codename)
+        except (PermissionError, OSError):
+            # Missing, not a directory or unreadable - try the next root
+            continue
+        
+        for version, bundle_path in version_dirs:
+            bundle_info = get_bundle_info(codename, version, bundle_path)
+            if bundle_info:
+                return bundle_info
     
-    return {
-        "valid": len(errors) == 0,
-        "errors": errors,
-        "warnings": warnings,
-    }
-
-
-async def find_latest_version(codename: str, max_days_back: int = 30) -> Optional[str]:
-    """
-    Find the latest GrapheneOS version via a single request to the releases atom feed.
-    GrapheneOS uses the same version for all devices; the feed lists the latest first.
-    """
-    global _LATEST_VERSION_CACHE, _LATEST_VERSION_CACHE_TIME
-    now = datetime.now()
-    if _LATEST_VERSION_CACHE is not None and _LATEST_VERSION_CACHE_TIME is not None:
-        if now - _LATEST_VERSION_CACHE_TIME < _LATEST_VERSION_CACHE_TTL:
-            return _LATEST_VERSION_CACHE
-    try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get("https://grapheneos.org/releases.atom")
-            if response.status_code != 200:
-                return None
-            match = re.search(r"<entry>.*?<title>(\d{10})</title>", response.text, re.DOTALL)
-            if match:
-                version = match.group(1)
-                _LATEST_VERSION_CACHE = version
-                _LATEST_VERSION_CACHE_TIME = now
-                return version
-    except Exception:
-        pass
     return None
 
 
-async def get_available_releases(codename: str) -> List[Dict[str, Any]]:
-    """Get available GrapheneOS releases for a codename"""
-    # GrapheneOS doesn't provide a public releases.json API
-    # Install zip URL: https://releases.grapheneos.org/{codename}-install-{version}.zip
-    # Version format is typically: YYYYMMDDXX (e.g., 2024122200)
-    # Since we can't fetch a list, we return an empty list and the UI allows manual entry
-    # In the future, we could scrape their website or maintain a known versions list
-    try:
-        # Try to check if there's a releases endpoint (though it likely doesn't exist)
-        releases_url = f"https://releases.grapheneos.org/{codename}/releases.json"
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(releases_url)
-            if response.status_code == 200:
-                data = response.json()
-                # If they have a releases.json, parse it
-                if isinstance(data, list):
-                    return data
-                elif isinstance(data, dict) and "releases" in data:
-                    return data["releases"]
-    except Exception:
-        # If releases.json doesn't exist (expected), return empty list
-        # UI will allow manual version entry
-        pass
-    
-    return []
-
-
 async def download_release(
     codename: str,
     version: str,
-    progress_callback=None
+    progress_callback=None,
+    client: Optional[httpx.AsyncClient] = None,
 ) -> Dict[str, Any]:
     """Download a GrapheneOS factory image release"""
-    bundles_root = Path(settings.GRAPHENE_BUNDLES_ROOT)
-    if not bundles_root.exists():
-        bundles_root.mkdir(parents=True, exist_ok=True)
-    
-    # Create codename and version directories
-    version_dir = bundles_root / codename / version
-    version_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Download URL: https://releases.grapheneos.org/{codename}-install-{version}.zip
-    # Version format is typically: YYYYMMDDXX (e.g., 2024122200)
-    
-    # Validate codename and version format
-    if not codename or not version:
-        raise ValueError("Codename and version are required")
-    
-    download_url = f"https://releases.grapheneos.org/{codename}-install-{version}.zip"
-    sha256_url = f"{download_url}.sha256"
-    sig_url = f"{download_url}.sig"
-    
-    image_zip_path = version_dir / "image.zip"
-    sha256_path = version_dir / "image.zip.sha256"
-    sig_path = version_dir / "image.zip.sig"
-    
-    errors = []
-    
-    factory_zip_path = version_dir / f"{codename}-install-{version}.zip"
-    
     try:
-        # Download install zip
-        async with httpx.AsyncClient(timeout=3600.0) as client:
-            # First, check if the file exists
-            head_response = await client.head(download_url)
-            if head_response.status_code == 404:
-                raise Exception(
-                    f"Release not found: {codename}-install-{version}.zip (HTTP 404). "
-                    f"Please verify the codename and version are correct. "
-                    f"Version format is typically YYYYMMDDXX (e.g., 2024122200)."
-                )
-            
-            async with client.stream("GET", download_url) as response:
-                if response.status_code != 200:
-                    raise Exception(
-                        f"Failed to download: HTTP {response.status_code}. "
-                        f"URL: {download_url}"
-                    )
-                
-                total_size = int(response.headers.get("content-length", 0))
-                downloaded = 0
-                
-                with open(factory_zip_path, "wb") as f:
-                    async for chunk in response.aiter_bytes(chunk_size=8192):
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if progress_callback:
-                            progress = (downloaded / total_size * 100) if total_size > 0 else 0
-                            await progress_callback(progress, downloaded, total_size)
-        
-        # Extract the install zip - GrapheneOS install ZIPs contain:
-        # - boot.img, system.img, vendor.img, etc.
-        # - flash-all.sh (Unix)
-        # - flash-all.bat (Windows)
-        # - other files
-        # Extract first, then rename the factory ZIP to image.zip for compatibility
-        with zipfile.ZipFile(factory_zip_path, 'r') as zip_ref:
-            zip_ref.extractall(version_dir)
-        
-        # Rename the install zip to image.zip for compatibility with our bundle structure
-        # The extracted files will be used for flashing, image.zip for verification
-        factory_zip_path.rename(image_zip_path)
-        
-        # Download SHA256
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(sha256_url)
-                if response.status_code == 200:
-                    with open(sha256_path, "wb") as f:
-                        f.write(response.content)
-                else:
-                    errors.append("SHA256 file not available")
-        except Exception as e:
-            errors.append(f"Failed to download SHA256: {e}")
-        
-        # Download signature (optional)
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(sig_url)
-                if response.status_code == 200:
-                    with open(sig_path, "wb") as f:
-                        f.write(response.content)
-        except Exception:
-            pass  # Signature is optional
-        
-        # Verify SHA256 if available
-        if sha256_path.exists():
-            try:
-                with open(image_zip_path, "rb") as f:
-                    sha256_hash = hashlib.sha256(f.read()).hexdigest()
-                
-                with open(sha256_path, "r") as f:
-                    expected_hash = f.read().strip().split()[0]
-                
-                if sha256_hash != expected_hash:
-                    errors.append("SHA256 checksum mismatch")
-            except Exception as e:
-                errors.append(f"Could not verify SHA256: {e}")
-        
-        # Create metadata.json
-        metadata = {
-            "codename": codename,
-            "version": version,
-            "deviceName": codename,
-            "files": {
-                "imageZip": "image.zip",
-                "sha256": "image.zip.sha256",
-                "sig": "image.zip.sig",
-                "flashSh": "flash-all.sh",
-                "flashBat": "flash-all.bat",
-            },
-            "downloaded": True,
-        }
-        
-        metadata_path = version_dir / "metadata.json"
-        with open(metadata_path, "w") as f:
-            json.dump(metadata, f, indent=2)
-        
-        return {
-            "success": len(errors) == 0,
-            "codename": codename,
-            "version": version,
-            "path": str(version_dir),
-            "errors": errors,
-        }
-        
-    except Exception as e:
-        # Cleanup on error
-        if factory_zip_path.exists():
-            factory_zip_path.unlink()
-        if image_zip_path.exists():
-            image_zip_path.unlink()
-        raise
-
+        return await download_release_to(
+            Path(settings.GRAPHENE_BUNDLES_ROOT), codename, version, progress_callback, client
+        )
+    finally:
+        invalidate_bundle_index()
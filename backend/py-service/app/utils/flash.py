@@ -1,45 +1,51 @@
-import subprocess
 import os
 import platform
 import asyncio
+import logging
+import time
+import traceback
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+import orjson
+from typing import Optional, Dict, Any, AsyncIterator, List, Set, Tuple
 from ..config import settings
+from . import jobstore
 
-# Job storage (in production, use a proper job queue)
-flash_jobs: Dict[str, Dict[str, Any]] = {}
+logger = logging.getLogger(__name__)
 
+# Flash subprocesses started by this worker process, keyed by job id.
+# Job state itself lives in the shared job store (see jobstore.py).
+flash_processes: Dict[str, asyncio.subprocess.Process] = {}
+# Jobs of this worker that were asked to cancel (see _cancel_local_flash)
+_cancelled_flash_jobs: Set[str] = set()
 
-def start_flash_job(
+# Running flash-all tasks (the event loop only keeps weak references)
+_flash_tasks: Set[asyncio.Task] = set()
+
+# Longest flash-all output line accepted by the stdout reader
+FLASH_LINE_LIMIT = 1 << 20
+
+# Cached /flash/jobs projection, keyed by the job store version
+JOBS_SUMMARY_MAX_AGE = 60.0  # also refresh periodically so Redis-expired jobs drop out
+_jobs_summary: Tuple[Optional[int], float, List[Dict[str, Any]]] = (None, 0.0, [])
+
+# Encoded log arrays for GET /flash/jobs/{id}, keyed by job id and valid while
+# the job's log sequence number is unchanged (most recently used last)
+JOB_LOGS_CACHE_SIZE = 32
+_job_logs_json: "OrderedDict[str, Tuple[int, int, bytes]]" = OrderedDict()
+
+
+async def start_flash_job(
     device_serial: str,
     bundle_path: str,
     dry_run: bool = False,
     confirmation_token: Optional[str] = None,
 ) -> str:
     """Start a flash job"""
-    import uuid
     job_id = str(uuid.uuid4())
     
-    # Safety check: require typed confirmation
-    if settings.REQUIRE_TYPED_CONFIRMATION:
-        expected_token = f"FLASH {device_serial}"
-        if confirmation_token != expected_token:
-            raise ValueError(f"Invalid confirmation token. Expected: {expected_token}")
-    
-    # Verify bundle
-    from .bundles import verify_bundle
-    verification = verify_bundle(bundle_path)
-    
-    # Only fail on actual errors, not warnings (like SHA256 mismatch for renamed files)
-    if verification["errors"]:
-        raise ValueError(f"Bundle verification failed: {verification['errors']}")
-    
-    # Log warnings but don't fail
-    if verification["warnings"]:
-        import logging
-        logger = logging.getLogger(__name__)
-        for warning in verification["warnings"]:
-            logger.warning(f"Bundle verification warning: {warning}")
+    await _check_flash_request(device_serial, bundle_path, confirmation_token)
     
     # Create job FIRST before starting thread
     job = {
@@ -48,163 +54,232 @@ def start_flash_job(
         "bundle_path": bundle_path,
         "dry_run": dry_run,
         "status": "starting",
-        "logs": [],
-        "process": None,
     }
     
+    # Cancel requests from any worker reach this one, which runs the job;
+    # listen before the job becomes visible
+    await jobstore.add_cancel_handler(job_id, _cancel_local_flash)
+    
     # Store job immediately so it can be queried
-    flash_jobs[job_id] = job
+    await jobstore.create_job("flash", job_id, job)
     
-    # Start flashing process (in a thread to avoid blocking)
-    import threading
-    thread = threading.Thread(target=_run_flash, args=(job,))
-    thread.daemon = True
-    thread.start()
+    # Run the flash script as a task on the event loop
+    task = asyncio.create_task(_run_flash(job))
+    _flash_tasks.add(task)
+    task.add_done_callback(_flash_tasks.discard)
+    task.add_done_callback(lambda _: _forget_cancel(job_id))
     
     return job_id
 
 
-def _run_flash(job: Dict[str, Any]):
-    """Run the flash process"""
-    # Ensure job persists in flash_jobs dict
-    job_id = job.get("id")
-    if job_id:
-        flash_jobs[job_id] = job
+async def _check_flash_request(device_serial: str, bundle_path: str, confirmation_token: Optional[str]) -> None:
+    """Check the typed confirmation and verify the bundle before flashing
     
+    Raises ValueError if the confirmation is wrong or the bundle has errors;
+    verification warnings (like a SHA256 mismatch for renamed files) are only logged.
+    """
+    # Safety check: require typed confirmation
+    if settings.REQUIRE_TYPED_CONFIRMATION:
+        expected_token = f"FLASH {device_serial}"
+        if confirmation_token != expected_token:
+            raise ValueError(f"Invalid confirmation token. Expected: {expected_token}")
+    
+    # Verify bundle
+    from .bundles import verify_bundle
+    verification = await asyncio.to_thread(verify_bundle, bundle_path)
+    
+    # Only fail on actual errors, not warnings
+    if verification["errors"]:
+        raise ValueError(f"Bundle verification failed: {verification['errors']}")
+    
+    for warning in verification["warnings"]:
+        logger.warning(f"Bundle verification warning: {warning}")
+
+
+def _flash_command(bundle_path: Path) -> Tuple[Path, List[str]]:
+    """Get the bundle's flash-all script and the command that runs it"""
+    if platform.system() == "Windows":
+        flash_script = bundle_path / "flash-all.bat"
+        return flash_script, [str(flash_script)]
+    flash_script = bundle_path / "flash-all.sh"
+    return flash_script, ["bash", str(flash_script)]
+
+
+def _flash_env(device_serial: str) -> Dict[str, str]:
+    """Environment for flash-all: target device serial and fastboot on PATH"""
+    env = os.environ.copy()
+    env["ANDROID_SERIAL"] = device_serial
+    fastboot_dir = os.path.dirname(settings.FASTBOOT_PATH)
+    current_path = env.get("PATH", "")
+    if fastboot_dir not in current_path:
+        env["PATH"] = f"{fastboot_dir}{os.pathsep}{current_path}"
+    return env
+
+
+async def _start_flash_process(cmd: List[str], cwd: str, env: Dict[str, str]) -> asyncio.subprocess.Process:
+    """Start a flash-all script with stderr merged into stdout"""
+    return await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env=env,
+        limit=FLASH_LINE_LIMIT,
+    )
+
+
+async def _iter_output_lines(process: asyncio.subprocess.Process) -> AsyncIterator[str]:
+    """Yield non-empty output lines until the process closes its stdout"""
+    async for raw in process.stdout:
+        line = raw.decode("utf-8", "replace").strip()
+        if line:
+            yield line
+
+
+async def _run_flash(job: Dict[str, Any]):
+    """Run the flash process"""
+    job_id = job["id"]
     bundle_path = Path(job["bundle_path"])
     device_serial = job["device_serial"]
     dry_run = job["dry_run"]
     
-    # Determine flash script
-    is_windows = platform.system() == "Windows"
-    flash_script = bundle_path / ("flash-all.bat" if is_windows else "flash-all.sh")
+    flash_script, cmd = _flash_command(bundle_path)
     
     if not flash_script.exists():
-        job["status"] = "failed"
-        job["logs"].append("ERROR: Flash script not found")
+        await jobstore.append_log(job_id, "ERROR: Flash script not found")
+        await jobstore.set_job_field(job_id, "status", "failed")
         return
     
-    # Prepare command
-    if is_windows:
-        cmd = [str(flash_script)]
-    else:
-        cmd = ["bash", str(flash_script)]
-    
     if dry_run:
-        job["status"] = "completed"
-        job["logs"].append(f"[DRY RUN] Would execute: {' '.join(cmd)}")
-        job["logs"].append(f"[DRY RUN] Device: {device_serial}")
+        await jobstore.append_log(
+            job_id,
+            f"[DRY RUN] Would execute: {' '.join(cmd)}",
+            f"[DRY RUN] Device: {device_serial}",
+        )
+        await jobstore.set_job_field(job_id, "status", "completed")
         return
     
     # Execute flash script
     try:
-        # Set environment variables for device serial and fastboot path
-        env = os.environ.copy()
-        env["ANDROID_SERIAL"] = device_serial
-        # Ensure fastboot is in PATH
-        fastboot_dir = os.path.dirname(settings.FASTBOOT_PATH)
-        current_path = env.get("PATH", "")
-        if fastboot_dir not in current_path:
-            env["PATH"] = f"{fastboot_dir}:{current_path}"
-        
-        job["status"] = "running"
-        job["logs"].append(f"Starting flash process for device: {device_serial}")
-        job["logs"].append(f"Using bundle: {bundle_path}")
-        job["logs"].append(f"Command: {' '.join(cmd)}")
-        job["logs"].append(f"Fastboot path: {settings.FASTBOOT_PATH}")
+        env = _flash_env(device_serial)
         
-        process = subprocess.Popen(
-            cmd,
-            cwd=str(bundle_path),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=0,  # Unbuffered for real-time output
-            universal_newlines=True,
-            env=env,
+        await jobstore.set_job_field(job_id, "status", "running")
+        await jobstore.append_log(
+            job_id,
+            f"Starting flash process for device: {device_serial}",
+            f"Using bundle: {bundle_path}",
+            f"Command: {' '.join(cmd)}",
+            f"Fastboot path: {settings.FASTBOOT_PATH}",
         )
         
-        job["process"] = process
-        job["logs"].append("Flash process started, streaming output...")
+        process = await _start_flash_process(cmd, str(bundle_path), env)
         
-        # Stream output in real-time (non-blocking)
-        import select
-        import sys
+        flash_processes[job_id] = process
+        if job_id in _cancelled_flash_jobs:
+            # Cancelled before the process existed
+            process.terminate()
+        await jobstore.append_log(job_id, "Flash process started, streaming output...")
         
-        # Use select for non-blocking read (Unix only)
-        if hasattr(select, 'select'):
-            while True:
-                # Check if process is still running
-                if process.poll() is not None:
-                    # Process finished, read remaining output
-                    remaining = process.stdout.read()
-                    if remaining:
-                        for line in remaining.splitlines():
-                            if line.strip():
-                                job["logs"].append(line.strip())
-                    break
-                
-                # Check if there's data to read (non-blocking)
-                ready, _, _ = select.select([process.stdout], [], [], 0.1)
-                if ready:
-                    line = process.stdout.readline()
-                    if line:
-                        line = line.strip()
-                        if line:  # Only add non-empty lines
-                            job["logs"].append(line)
-        else:
-            # Fallback for Windows or systems without select
-            for line in iter(process.stdout.readline, ''):
-                if line:
-                    line = line.strip()
-                    if line:
-                        job["logs"].append(line)
-                if process.poll() is not None:
-                    break
+        # Stream output in real-time; the loop ends when the script exits or
+        # cancel_flash_job terminates it
+        async for line in _iter_output_lines(process):
+            await jobstore.append_log(job_id, line)
         
-        return_code = process.poll()
+        return_code = await process.wait()
         
-        if return_code == 0:
-            job["status"] = "completed"
-            job["logs"].append("✓ Flash completed successfully!")
+        if job_id in _cancelled_flash_jobs:
+            await jobstore.append_log(job_id, "Flash cancelled")
+            await jobstore.set_job_field(job_id, "status", "cancelled")
+        elif return_code == 0:
+            await jobstore.append_log(job_id, "✓ Flash completed successfully!")
+            await jobstore.set_job_field(job_id, "status", "completed")
         else:
-            job["status"] = "failed"
-            job["logs"].append(f"✗ Flash failed with exit code: {return_code}")
+            await jobstore.append_log(job_id, f"✗ Flash failed with exit code: {return_code}")
+            await jobstore.set_job_field(job_id, "status", "failed")
             
     except Exception as e:
-        job["status"] = "failed"
-        job["logs"].append(f"ERROR: {str(e)}")
-        import traceback
-        job["logs"].append(f"Traceback: {traceback.format_exc()}")
+        await jobstore.append_log(job_id, f"ERROR: {str(e)}", f"Traceback: {traceback.format_exc()}")
+        await jobstore.set_job_field(job_id, "status", "failed")
     finally:
-        if job["process"]:
-            job["process"] = None
-        # Ensure job persists in flash_jobs dict
-        job_id = job.get("id")
-        if job_id:
-            flash_jobs[job_id] = job
+        flash_processes.pop(job_id, None)
 
 
-def get_flash_job(job_id: str) -> Optional[Dict[str, Any]]:
+async def get_flash_job(job_id: str) -> Optional[Dict[str, Any]]:
     """Get flash job status"""
-    return flash_jobs.get(job_id)
+    return await jobstore.get_job(job_id)
 
 
-def cancel_flash_job(job_id: str) -> bool:
-    """Cancel a flash job"""
-    job = flash_jobs.get(job_id)
-    if not job:
-        return False
+async def get_flash_job_logs_json(job_id: str) -> Tuple[int, int, bytes]:
+    """Get (log_seq, line count, JSON-encoded log lines) for a job
+    
+    Polling clients re-fetch the full log every second; the encoded array is
+    reused until a new line is appended instead of re-reading and re-encoding
+    up to MAX_JOB_LOG_LINES lines per request.
+    """
+    seq = await jobstore.get_log_count(job_id)
+    cached = _job_logs_json.get(job_id)
+    if cached is not None and cached[0] == seq:
+        _job_logs_json.move_to_end(job_id)
+        return cached
+    
+    seq, logs = await jobstore.get_logs_since(job_id, 0)
+    entry = (seq, len(logs), orjson.dumps(logs))
+    _job_logs_json[job_id] = entry
+    _job_logs_json.move_to_end(job_id)
+    while len(_job_logs_json) > JOB_LOGS_CACHE_SIZE:
+        _job_logs_json.popitem(last=False)
+    return entry
+
+
+async def list_flash_job_summaries() -> List[Dict[str, Any]]:
+    """List flash jobs (id, serial, status, dry_run), rebuilt only when jobs change"""
+    global _jobs_summary
+    version = await jobstore.get_version()
+    cached_version, built_at, summary = _jobs_summary
+    now = time.monotonic()
+    if version == cached_version and now - built_at < JOBS_SUMMARY_MAX_AGE:
+        return summary
     
-    if job["process"]:
-        try:
-            job["process"].terminate()
-            job["status"] = "cancelled"
-            return True
-        except Exception:
-            pass
+    summary = [
+        {
+            "id": job["id"],
+            "device_serial": job["device_serial"],
+            "status": job["status"],
+            "dry_run": job.get("dry_run", False),
+        }
+        for job in await jobstore.list_jobs("flash")
+    ]
+    _jobs_summary = (version, now, summary)
+    return summary
+
+
+async def cancel_flash_job(job_id: str) -> bool:
+    """Request cancellation of a flash job
     
-    return False
+    The job may run in another worker process, so this publishes the request
+    and returns; that worker terminates the flash script and sets the status
+    to "cancelled". Returns False if the job doesn't exist or has finished.
+    """
+    job = await jobstore.get_job(job_id)
+    if job is None or job.get("status") in jobstore.TERMINAL_STATUSES:
+        return False
+    
+    await jobstore.request_cancel(job_id)
+    return True
+
+
+def _cancel_local_flash(job_id: str) -> None:
+    """Cancel handler for flash jobs running in this worker"""
+    _cancelled_flash_jobs.add(job_id)
+    process = flash_processes.get(job_id)
+    if process is not None and process.returncode is None:
+        # Ends the output loop in _run_flash, which records the cancellation
+        process.terminate()
+
+
+def _forget_cancel(job_id: str) -> None:
+    jobstore.remove_cancel_handler(job_id)
+    _cancelled_flash_jobs.discard(job_id)
 
 
 async def execute_flash_direct(
@@ -214,23 +289,10 @@ async def execute_flash_direct(
     confirmation_token: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Execute flash directly and return result with logs"""
-    # Safety check: require typed confirmation
-    if settings.REQUIRE_TYPED_CONFIRMATION:
-        expected_token = f"FLASH {device_serial}"
-        if confirmation_token != expected_token:
-            raise ValueError(f"Invalid confirmation token. Expected: {expected_token}")
-    
-    # Verify bundle
-    from .bundles import verify_bundle
-    verification = verify_bundle(bundle_path)
-    
-    # Only fail on actual errors, not warnings
-    if verification["errors"]:
-        raise ValueError(f"Bundle verification failed: {verification['errors']}")
+    await _check_flash_request(device_serial, bundle_path, confirmation_token)
     
     bundle_path_obj = Path(bundle_path)
-    is_windows = platform.system() == "Windows"
-    flash_script = bundle_path_obj / ("flash-all.bat" if is_windows else "flash-all.sh")
+    flash_script, cmd = _flash_command(bundle_path_obj)
     
     if not flash_script.exists():
         raise ValueError(f"Flash script not found at: {flash_script}")
@@ -240,7 +302,7 @@ async def execute_flash_direct(
     logs.append(f"Using bundle: {bundle_path}")
     
     if dry_run:
-        logs.append(f"[DRY RUN] Would execute: bash {flash_script}")
+        logs.append(f"[DRY RUN] Would execute: {' '.join(cmd)}")
         return {
             "success": True,
             "dry_run": True,
@@ -248,35 +310,14 @@ async def execute_flash_direct(
             "message": "Dry run completed"
         }
     
-    # Prepare command
-    if is_windows:
-        cmd = [str(flash_script)]
-    else:
-        cmd = ["bash", str(flash_script)]
-    
-    # Set environment variables
-    env = os.environ.copy()
-    env["ANDROID_SERIAL"] = device_serial
-    fastboot_dir = os.path.dirname(settings.FASTBOOT_PATH)
-    current_path = env.get("PATH", "")
-    if fastboot_dir not in current_path:
-        env["PATH"] = f"{fastboot_dir}:{current_path}"
+    env = _flash_env(device_serial)
     
     logs.append(f"Command: {' '.join(cmd)}")
     logs.append(f"Fastboot path: {settings.FASTBOOT_PATH}")
     logs.append("Flash process starting...")
     
     try:
-        # Execute in a thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            _run_flash_sync,
-            cmd,
-            str(bundle_path_obj),
-            env,
-            logs
-        )
+        result = await _run_flash_to_completion(cmd, str(bundle_path_obj), env, logs)
         
         return {
             "success": result["success"],
@@ -287,7 +328,6 @@ async def execute_flash_direct(
     except Exception as e:
         error_msg = str(e)
         logs.append(f"ERROR: {error_msg}")
-        import traceback
         traceback_str = traceback.format_exc()
         logs.append(f"Traceback: {traceback_str}")
         return {
@@ -299,54 +339,18 @@ async def execute_flash_direct(
         }
 
 
-def _run_flash_sync(cmd: List[str], cwd: str, env: Dict[str, str], logs: List[str]) -> Dict[str, Any]:
-    """Run flash synchronously (called from thread pool)"""
+async def _run_flash_to_completion(cmd: List[str], cwd: str, env: Dict[str, str], logs: List[str]) -> Dict[str, Any]:
+    """Run flash to completion, collecting its output into logs"""
     try:
-        process = subprocess.Popen(
-            cmd,
-            cwd=cwd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=0,  # Unbuffered for real-time output
-            universal_newlines=True,
-            env=env,
-        )
+        process = await _start_flash_process(cmd, cwd, env)
         
         logs.append("Flash process started, streaming output...")
         
-        # Stream output in real-time
-        import select
-        
-        if hasattr(select, 'select'):
-            # Unix: use select for non-blocking read
-            while True:
-                if process.poll() is not None:
-                    remaining = process.stdout.read()
-                    if remaining:
-                        for line in remaining.splitlines():
-                            if line.strip():
-                                logs.append(line.strip())
-                    break
-                
-                ready, _, _ = select.select([process.stdout], [], [], 0.1)
-                if ready:
-                    line = process.stdout.readline()
-                    if line:
-                        line = line.strip()
-                        if line:
-                            logs.append(line)
-        else:
-            # Windows: fallback
-            for line in iter(process.stdout.readline, ''):
-                if line:
-                    line = line.strip()
-                    if line:
-                        logs.append(line)
-                if process.poll() is not None:
-                    break
+        # Collect output until the script closes stdout
+        async for line in _iter_output_lines(process):
+            logs.append(line)
         
-        return_code = process.poll()
+        return_code = await process.wait()
         
         if return_code == 0:
             logs.append("✓ Flash completed successfully!")
@@ -364,7 +368,6 @@ def _run_flash_sync(cmd: List[str], cwd: str, env: Dict[str, str], logs: List[st
     except Exception as e:
         error_msg = str(e)
         logs.append(f"ERROR: {error_msg}")
-        import traceback
         traceback_str = traceback.format_exc()
         logs.append(f"Traceback: {traceback_str}")
         return {
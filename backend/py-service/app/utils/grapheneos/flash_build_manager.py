@@ -140,10 +140,12 @@ class PythonBuildManager:
                 return self._find_install_directory(version_dir)
         else:
             # Find latest version
-            versions = []
-            for v_dir in codename_dir.iterdir():
-                if v_dir.is_dir() and not v_dir.name.startswith('.'):
-                    versions.append((v_dir.name, v_dir))
+            # scandir's is_dir() needs no stat() per entry; name check first
+            with os.scandir(codename_dir) as v_entries:
+                versions = [
+                    (v_entry.name, Path(v_entry.path)) for v_entry in v_entries
+                    if not v_entry.name.startswith('.') and v_entry.is_dir()
+                ]
             
             if versions:
                 # Sort by version (newest first) - assuming YYYYMMDDXX format
@@ -0,0 +1,588 @@
+"""Shared job state for flash, build and download jobs
+
+Job metadata is stored in a Redis hash ``job:{id}`` and log lines in a Redis
+list ``job:{id}:logs`` so that every worker process sees the same jobs. Only
+the last MAX_JOB_LOG_LINES lines are kept; ``job:{id}:log_seq`` counts every
+line ever appended so readers can resume by sequence number even after old
+lines were dropped. All keys expire after JOB_TTL_SECONDS. Every log append
+and status change also publishes an empty message on ``job:{id}:events``;
+each process runs a single pattern subscription to those channels and wakes
+its local JobWatchers, so streams wait for changes instead of polling. A
+cancel request is published on the same channel as ``cancel``; the process
+running the job acts on it through its cancel handler. When Redis is not
+available the store falls back to in-process dicts, which only works for
+single-worker deployments.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# Redis key prefixes
+JOB_KEY_PREFIX = "job:"
+JOB_INDEX_PREFIX = "jobs:"
+# Bumped whenever a job is created or changes status
+JOB_VERSION_KEY = "jobs:version"
+# Matches every job's events channel (see _events_channel)
+JOB_EVENTS_PATTERN = f"{JOB_KEY_PREFIX}*:events"
+# Message asking the process that runs a job to stop it (other events are empty)
+CANCEL_MESSAGE = "cancel"
+
+# Jobs (and their logs) are kept for one day
+JOB_TTL_SECONDS = 86400
+
+# In-process store: number of finished jobs kept before the oldest are evicted
+MAX_FINISHED_JOBS = 256
+
+# Log lines kept per job; older lines are dropped (ring buffer)
+MAX_JOB_LOG_LINES = 5000
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled", "error", "not_implemented"})
+
+# Returns [log_seq, lines appended after ARGV[1]] atomically, so a concurrent
+# append/trim cannot shift the window between reading the counter and the list
+_LOGS_SINCE_LUA = """
+local seq = tonumber(redis.call('GET', KEYS[1]) or '0')
+local count = seq - tonumber(ARGV[1])
+if count <= 0 then
+    return {seq, {}}
+end
+return {seq, redis.call('LRANGE', KEYS[2], -count, -1)}
+"""
+
+# Sets fields on an existing job hash and refreshes its TTL; a write to a job
+# that expired or was never created is dropped (returns 0) instead of
+# recreating a partial hash. ARGV: ttl, status changed ('1'/'0'), events
+# channel, then field/value pairs.
+_UPDATE_JOB_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 4))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+if ARGV[2] == '1' then
+    redis.call('INCR', KEYS[2])
+    redis.call('PUBLISH', ARGV[3], '')
+end
+return 1
+"""
+
+# create_job() for a job id that is free: missing, or with no status or a
+# terminal one. Returns 0 without writing if the job is still running.
+# ARGV: ttl, index score, job id, number of terminal statuses, the terminal
+# statuses (JSON encoded, like hash values), then field/value pairs.
+_CLAIM_JOB_LUA = """
+local status = redis.call('HGET', KEYS[1], 'status')
+local first_field = 5 + tonumber(ARGV[4])
+if status then
+    local finished = false
+    for i = 5, first_field - 1 do
+        if status == ARGV[i] then
+            finished = true
+        end
+    end
+    if not finished then
+        return 0
+    end
+end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+redis.call('HSET', KEYS[1], unpack(ARGV, first_field))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[4], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[4], ARGV[1])
+redis.call('INCR', KEYS[5])
+return 1
+"""
+_TERMINAL_STATUS_ARGS = [orjson.dumps(status) for status in sorted(TERMINAL_STATUSES)]
+
+# Set at application startup (see app.main lifespan)
+_redis: Optional["Redis"] = None
+_logs_since_script = None
+_update_job_script = None
+_claim_job_script = None
+
+# In-process fallback when Redis is not configured
+_memory_jobs: Dict[str, Dict[str, Any]] = {}
+_memory_logs: Dict[str, Deque[str]] = {}
+_memory_log_seq: Dict[str, int] = {}
+_memory_index: Dict[str, Dict[str, None]] = {}
+# Finished job ids, oldest first (eviction order)
+_memory_finished: "OrderedDict[str, None]" = OrderedDict()
+# Monotonic time of each job's last write, least recently written first
+_memory_touched: "OrderedDict[str, float]" = OrderedDict()
+_memory_version = 0
+
+# One event per JobWatcher in this process, set whenever the watched job changes
+_watchers: Dict[str, Set[asyncio.Event]] = {}
+# Called with the job id when a cancel is requested for a job run by this process
+_cancel_handlers: Dict[str, Callable[[str], None]] = {}
+# With Redis, the task that listens on JOB_EVENTS_PATTERN and sets _watchers.
+# It holds one pub/sub connection per process, however many streams are open.
+_event_listener: Optional[asyncio.Task] = None
+# Delayed restart after the listener fails (kept here so it isn't collected)
+_event_listener_restart: Optional[asyncio.Task] = None
+_EVENT_LISTENER_LOCK = asyncio.Lock()
+
+
+def init_jobstore(redis: Optional["Redis"]) -> None:
+    """Use the given Redis client for job state (None selects the in-process store)"""
+    global _redis, _logs_since_script, _update_job_script, _claim_job_script, _event_listener
+    if _event_listener is not None:
+        _event_listener.cancel()
+        _event_listener = None
+    _redis = redis
+    _logs_since_script = redis.register_script(_LOGS_SINCE_LUA) if redis is not None else None
+    _update_job_script = redis.register_script(_UPDATE_JOB_LUA) if redis is not None else None
+    _claim_job_script = redis.register_script(_CLAIM_JOB_LUA) if redis is not None else None
+    if redis is None:
+        logger.warning("Job store running in-process; jobs are not shared between workers")
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def _logs_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}:logs"
+
+
+def _log_seq_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}:log_seq"
+
+
+def _index_key(kind: str) -> str:
+    return f"{JOB_INDEX_PREFIX}{kind}"
+
+
+def _events_channel(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}:events"
+
+
+def _notify_watchers(job_id: str) -> None:
+    for event in _watchers.get(job_id, ()):
+        event.set()
+
+
+def _run_cancel_handler(job_id: str) -> None:
+    handler = _cancel_handlers.get(job_id)
+    if handler is None:
+        # Not running in this process
+        return
+    try:
+        handler(job_id)
+    except Exception as e:
+        logger.warning(f"Cancel handler for job {job_id} failed: {e}")
+
+
+async def _ensure_event_listener() -> None:
+    """Start the process-wide Redis event listener if it isn't running
+
+    The pattern subscription is in place before this returns, so a watcher
+    registered afterwards doesn't miss events.
+    """
+    global _event_listener
+    if _event_listener is not None and not _event_listener.done():
+        return
+    async with _EVENT_LISTENER_LOCK:
+        if _event_listener is not None and not _event_listener.done():
+            return
+        pubsub = _redis.pubsub()
+        await pubsub.psubscribe(JOB_EVENTS_PATTERN)
+        _event_listener = asyncio.create_task(_listen_for_job_events(pubsub))
+
+
+async def _listen_for_job_events(pubsub) -> None:
+    """Wake the local watchers of every job that publishes an event
+
+    Also runs the cancel handlers of jobs this process is running.
+    """
+    global _event_listener_restart
+    prefix, suffix = len(JOB_KEY_PREFIX), -len(":events")
+    try:
+        async for message in pubsub.listen():
+            if message["type"] != "pmessage":
+                continue
+            channel, data = message["channel"], message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            if isinstance(data, bytes):
+                data = data.decode()
+            job_id = channel[prefix:suffix]
+            if data == CANCEL_MESSAGE:
+                _run_cancel_handler(job_id)
+            else:
+                _notify_watchers(job_id)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Job event listener stopped: {e}")
+        if _cancel_handlers:
+            # Nothing else restarts it for jobs no one is watching
+            _event_listener_restart = asyncio.create_task(_restart_event_listener())
+    finally:
+        try:
+            await pubsub.close()
+        except Exception as e:
+            logger.debug(f"Error closing job event subscription: {e}")
+        # Events may have been missed; let every watcher re-read (the next
+        # wait() restarts the listener)
+        for job_id in list(_watchers):
+            _notify_watchers(job_id)
+
+
+async def _restart_event_listener(delay: float = 1.0) -> None:
+    await asyncio.sleep(delay)
+    try:
+        await _ensure_event_listener()
+    except Exception as e:
+        logger.warning(f"Could not restart job event listener: {e}")
+
+
+async def close_jobstore() -> None:
+    """Stop the Redis event listener (call before closing the Redis client)"""
+    global _event_listener
+    if _event_listener is None:
+        return
+    _event_listener.cancel()
+    try:
+        await _event_listener
+    except asyncio.CancelledError:
+        pass
+    _event_listener = None
+
+
+async def add_cancel_handler(job_id: str, handler: Callable[[str], None]) -> None:
+    """Call ``handler(job_id)`` when request_cancel() is called for the job
+
+    Register it in the process that runs the job, before other workers can
+    see the job, and remove it with remove_cancel_handler() once the job ends.
+    """
+    if _redis is not None:
+        await _ensure_event_listener()
+    _cancel_handlers[job_id] = handler
+
+
+def remove_cancel_handler(job_id: str) -> None:
+    _cancel_handlers.pop(job_id, None)
+
+
+async def request_cancel(job_id: str) -> None:
+    """Ask whichever process runs the job to cancel it
+
+    Only sends the request; the job's status changes once its handler has
+    stopped it.
+    """
+    if _redis is None:
+        _run_cancel_handler(job_id)
+        return
+    await _redis.publish(_events_channel(job_id), CANCEL_MESSAGE)
+
+
+def _track_finished(job_id: str, status: Optional[str]) -> None:
+    """Record a job reaching a terminal status and evict the oldest finished jobs"""
+    if status not in TERMINAL_STATUSES:
+        return
+    _memory_finished[job_id] = None
+    _memory_finished.move_to_end(job_id)
+    while len(_memory_finished) > MAX_FINISHED_JOBS:
+        evicted_id, _ = _memory_finished.popitem(last=False)
+        _forget_job(evicted_id)
+
+
+def _touch(job_id: str) -> None:
+    """Record a write to a job (the in-process counterpart of refreshing its TTL)"""
+    _memory_touched[job_id] = time.monotonic()
+    _memory_touched.move_to_end(job_id)
+
+
+def _expire_idle_jobs() -> None:
+    """Drop jobs not written for JOB_TTL_SECONDS, like the Redis key expiry does
+
+    This also covers jobs that never reach a terminal status (e.g. a worker
+    task that died mid-run), which MAX_FINISHED_JOBS eviction never sees.
+    """
+    cutoff = time.monotonic() - JOB_TTL_SECONDS
+    while _memory_touched:
+        job_id, touched = next(iter(_memory_touched.items()))
+        if touched > cutoff:
+            break
+        _forget_job(job_id)
+
+
+def _forget_job(job_id: str) -> None:
+    """Remove a job and its logs from the in-process store"""
+    _memory_jobs.pop(job_id, None)
+    _memory_logs.pop(job_id, None)
+    _memory_log_seq.pop(job_id, None)
+    _memory_finished.pop(job_id, None)
+    _memory_touched.pop(job_id, None)
+    for index in _memory_index.values():
+        index.pop(job_id, None)
+
+
+def _encode(fields: Dict[str, Any]) -> Dict[str, bytes]:
+    # Hash values are JSON so bools, numbers and nested results round-trip
+    return {name: orjson.dumps(value) for name, value in fields.items()}
+
+
+def _decode(raw: Dict[str, str]) -> Dict[str, Any]:
+    return {name: orjson.loads(value) for name, value in raw.items()}
+
+
+async def create_job(
+    kind: str,
+    job_id: str,
+    fields: Dict[str, Any],
+    logs: Optional[List[str]] = None,
+) -> None:
+    """Create (or reset) a job of the given kind ("flash", "build", "download")"""
+    global _memory_version
+    if _redis is None:
+        _expire_idle_jobs()
+        _memory_version += 1
+        _memory_jobs[job_id] = dict(fields)
+        _memory_logs[job_id] = deque(logs or (), maxlen=MAX_JOB_LOG_LINES)
+        _memory_log_seq[job_id] = len(logs or ())
+        _memory_index.setdefault(kind, {})[job_id] = None
+        _memory_finished.pop(job_id, None)
+        _touch(job_id)
+        _track_finished(job_id, fields.get("status"))
+        return
+
+    job_key = _job_key(job_id)
+    logs_key = _logs_key(job_id)
+    seq_key = _log_seq_key(job_id)
+    index_key = _index_key(kind)
+    async with _redis.pipeline(transaction=True) as pipe:
+        pipe.delete(job_key, logs_key, seq_key)
+        pipe.hset(job_key, mapping=_encode(fields))
+        pipe.expire(job_key, JOB_TTL_SECONDS)
+        if logs:
+            pipe.rpush(logs_key, *logs)
+            pipe.ltrim(logs_key, -MAX_JOB_LOG_LINES, -1)
+            pipe.expire(logs_key, JOB_TTL_SECONDS)
+            pipe.set(seq_key, len(logs), ex=JOB_TTL_SECONDS)
+        pipe.zadd(index_key, {job_id: time.time()})
+        pipe.expire(index_key, JOB_TTL_SECONDS)
+        pipe.incr(JOB_VERSION_KEY)
+        await pipe.execute()
+
+
+async def claim_job(kind: str, job_id: str, fields: Dict[str, Any]) -> bool:
+    """Create a job unless one with the same id is still running
+
+    Checking and creating is one atomic step, also across workers sharing
+    Redis, so two requests for the same job id can't both start it. Returns
+    False (and changes nothing) if the existing job has a non-terminal status.
+    """
+    if _redis is None:
+        # No await between the check and create_job's writes
+        job = _memory_jobs.get(job_id)
+        if job is not None and job.get("status") is not None and job["status"] not in TERMINAL_STATUSES:
+            return False
+        await create_job(kind, job_id, fields)
+        return True
+
+    pairs = [item for name, value in _encode(fields).items() for item in (name, value)]
+    claimed = await _claim_job_script(
+        keys=[_job_key(job_id), _logs_key(job_id), _log_seq_key(job_id), _index_key(kind), JOB_VERSION_KEY],
+        args=[JOB_TTL_SECONDS, time.time(), job_id, len(_TERMINAL_STATUS_ARGS), *_TERMINAL_STATUS_ARGS, *pairs],
+    )
+    return bool(claimed)
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get job metadata (without logs), or None if the job does not exist"""
+    if _redis is None:
+        job = _memory_jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    raw = await _redis.hgetall(_job_key(job_id))
+    if not raw:
+        return None
+    return _decode(raw)
+
+
+async def update_job(job_id: str, fields: Dict[str, Any]) -> None:
+    """Set several job fields at once"""
+    global _memory_version
+    if _redis is None:
+        job = _memory_jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+            _touch(job_id)
+            _notify_watchers(job_id)
+            if "status" in fields:
+                _memory_version += 1
+                _track_finished(job_id, fields["status"])
+        return
+
+    if not fields:
+        return
+    # Like the in-process branch, unknown (e.g. expired) jobs are ignored.
+    # The TTL is refreshed so jobs that are still active do not expire mid-run,
+    # and status changes bump the version and wake watchers, which re-read
+    # the job, so the message only needs to exist
+    pairs = [item for name, value in _encode(fields).items() for item in (name, value)]
+    await _update_job_script(
+        keys=[_job_key(job_id), JOB_VERSION_KEY],
+        args=[JOB_TTL_SECONDS, "1" if "status" in fields else "0", _events_channel(job_id), *pairs],
+    )
+
+
+async def set_job_field(job_id: str, field: str, value: Any) -> None:
+    """Set a single job field"""
+    await update_job(job_id, {field: value})
+
+
+async def append_log(job_id: str, *lines: str) -> int:
+    """Append log lines to a job and return its new log sequence number"""
+    if not lines:
+        return await get_log_count(job_id)
+
+    if _redis is None:
+        logs = _memory_logs.get(job_id)
+        if logs is None:
+            # Unknown or evicted job
+            return 0
+        logs.extend(lines)
+        _memory_log_seq[job_id] += len(lines)
+        _touch(job_id)
+        _notify_watchers(job_id)
+        return _memory_log_seq[job_id]
+
+    logs_key = _logs_key(job_id)
+    seq_key = _log_seq_key(job_id)
+    async with _redis.pipeline(transaction=True) as pipe:
+        pipe.rpush(logs_key, *lines)
+        pipe.ltrim(logs_key, -MAX_JOB_LOG_LINES, -1)
+        pipe.expire(logs_key, JOB_TTL_SECONDS)
+        pipe.incrby(seq_key, len(lines))
+        pipe.expire(seq_key, JOB_TTL_SECONDS)
+        # EXPIRE is a no-op if the job hash is gone, so this never resurrects one
+        pipe.expire(_job_key(job_id), JOB_TTL_SECONDS)
+        # One empty message wakes watchers for the whole batch
+        pipe.publish(_events_channel(job_id), "")
+        results = await pipe.execute()
+    return results[3]
+
+
+async def get_logs(job_id: str) -> List[str]:
+    """Get all buffered log lines (at most MAX_JOB_LOG_LINES)"""
+    if _redis is None:
+        return list(_memory_logs.get(job_id, ()))
+
+    return await _redis.lrange(_logs_key(job_id), 0, -1)
+
+
+async def get_logs_since(job_id: str, seq: int) -> Tuple[int, List[str]]:
+    """Get log lines appended after sequence number ``seq``
+
+    Returns the current sequence number and the new lines. Lines that were
+    already dropped from the buffer are skipped.
+    """
+    if _redis is None:
+        logs = _memory_logs.get(job_id)
+        if logs is None:
+            return seq, []
+        current = _memory_log_seq[job_id]
+        count = min(current - seq, len(logs))
+        if count <= 0:
+            return current, []
+        # Index from the right end, where deque access is cheap
+        return current, [logs[i] for i in range(-count, 0)]
+
+    current, lines = await _logs_since_script(
+        keys=[_log_seq_key(job_id), _logs_key(job_id)], args=[seq]
+    )
+    return int(current), lines
+
+
+async def get_log_count(job_id: str) -> int:
+    """Get the number of log lines ever appended to a job (its log sequence number)"""
+    if _redis is None:
+        return _memory_log_seq.get(job_id, 0)
+
+    return int(await _redis.get(_log_seq_key(job_id)) or 0)
+
+
+async def get_version() -> int:
+    """Get a counter that changes whenever any job is created or changes status"""
+    if _redis is None:
+        return _memory_version
+
+    return int(await _redis.get(JOB_VERSION_KEY) or 0)
+
+
+async def list_jobs(kind: str) -> List[Dict[str, Any]]:
+    """List metadata of all live jobs of the given kind, oldest first"""
+    if _redis is None:
+        return [
+            dict(_memory_jobs[job_id])
+            for job_id in _memory_index.get(kind, [])
+            if job_id in _memory_jobs
+        ]
+
+    index_key = _index_key(kind)
+    # Drop index entries whose job hash has expired
+    await _redis.zremrangebyscore(index_key, 0, time.time() - JOB_TTL_SECONDS)
+    job_ids = await _redis.zrange(index_key, 0, -1)
+    if not job_ids:
+        return []
+
+    async with _redis.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.hgetall(_job_key(job_id))
+        results = await pipe.execute()
+    return [_decode(raw) for raw in results if raw]
+
+
+class JobWatcher:
+    """Wait for changes (new log lines, status updates) to a job
+
+    Each watcher registers an asyncio.Event that is set when the job changes:
+    directly by writers on the in-process store, and by the process-wide
+    listener on the job's ``job:{id}:events`` channel with Redis. Either way
+    waiting costs nothing until the job changes. Callers re-read the job from
+    the store after every wakeup; the events only signal that something
+    changed.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._event = asyncio.Event()
+
+    async def __aenter__(self) -> "JobWatcher":
+        if _redis is not None:
+            await _ensure_event_listener()
+        _watchers.setdefault(self.job_id, set()).add(self._event)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        watchers = _watchers.get(self.job_id)
+        if watchers is not None:
+            watchers.discard(self._event)
+            if not watchers:
+                del _watchers[self.job_id]
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a change; False means nothing was seen"""
+        if _redis is not None:
+            # Restart the listener if its connection dropped
+            await _ensure_event_listener()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        # A burst of events sets the event once, so it causes a single re-read
+        self._event.clear()
+        return True
@@ -1,11 +1,17 @@
 import subprocess
 import os
+import time
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# identify_device results keyed by (serial, state); avoids re-spawning adb/fastboot
+# on every device list poll
+IDENTIFY_CACHE_TTL = 5.0
+_identify_cache: Dict[Tuple[str, str], Tuple[float, Optional[Dict[str, str]]]] = {}
+
 
 def check_tool_availability(tool_path: str) -> bool:
     """Check if a tool is available at the given path"""
@@ -312,6 +318,25 @@ def identify_device(serial: str) -> Optional[Dict[str, str]]:
     return None
 
 
+def cached_identify(serial: str, state: str) -> Optional[Dict[str, str]]:
+    """identify_device with a short TTL cache keyed by serial and connection state"""
+    key = (serial, state)
+    cached = _identify_cache.get(key)
+    now = time.monotonic()
+    if cached and now - cached[0] < IDENTIFY_CACHE_TTL:
+        return cached[1]
+    
+    identification = identify_device(serial)
+    _identify_cache[key] = (now, identification)
+    return identification
+
+
+def invalidate_identify_cache(serial: str) -> None:
+    """Drop cached identification for a device (e.g. after it reboots)"""
+    for key in [key for key in _identify_cache if key[0] == serial]:
+        _identify_cache.pop(key, None)
+
+
 def get_device_name(codename: str) -> str:
     """Get human-readable device name from codename"""
     device_names = {
@@ -7,11 +7,16 @@ bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
 
 # Worker processes
 workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+# UvicornWorker runs with loop="auto", which selects uvloop when it is
+# installed (see requirements.txt) and falls back to asyncio otherwise.
 worker_class = "uvicorn.workers.UvicornWorker"
 
 # Timeouts
 timeout = 120
-keepalive = 5
+# Keep idle client connections open so polling/SSE clients reuse them instead of
+# re-handshaking (UvicornWorker passes this through as timeout_keep_alive).
+# Uvicorn speaks HTTP/1.1 only; HTTP/2 multiplexing is terminated at the TLS proxy.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "75"))
 
 # Logging
 accesslog = "-"
@@ -0,0 +1,117 @@
+"""Tests for the in-process job store backend (app.utils.jobstore without Redis)"""
+
+import time
+
+import pytest
+
+from app.utils import jobstore
+
+
+@pytest.fixture(autouse=True)
+def memory_store(monkeypatch):
+    """A fresh, empty in-process store for each test"""
+    monkeypatch.setattr(jobstore, "_memory_jobs", {})
+    monkeypatch.setattr(jobstore, "_memory_logs", {})
+    monkeypatch.setattr(jobstore, "_memory_log_seq", {})
+    monkeypatch.setattr(jobstore, "_memory_index", {})
+    monkeypatch.setattr(jobstore, "_memory_finished", jobstore.OrderedDict())
+    monkeypatch.setattr(jobstore, "_memory_touched", jobstore.OrderedDict())
+    monkeypatch.setattr(jobstore, "_memory_version", 0)
+    monkeypatch.setattr(jobstore, "_watchers", {})
+    jobstore.init_jobstore(None)
+
+
+@pytest.mark.asyncio
+async def test_get_logs_since_skips_trimmed_lines(monkeypatch):
+    monkeypatch.setattr(jobstore, "MAX_JOB_LOG_LINES", 5)
+    await jobstore.create_job("flash", "j1", {"status": "running"}, logs=["line 0"])
+    seq = await jobstore.append_log("j1", *(f"line {i}" for i in range(1, 8)))
+
+    assert seq == 8
+    assert await jobstore.get_logs("j1") == [f"line {i}" for i in range(3, 8)]
+    # Lines 0-2 were dropped from the buffer, so a reader at 0 only gets what is left
+    assert await jobstore.get_logs_since("j1", 0) == (8, [f"line {i}" for i in range(3, 8)])
+    assert await jobstore.get_logs_since("j1", 6) == (8, ["line 6", "line 7"])
+    assert await jobstore.get_logs_since("j1", 8) == (8, [])
+    assert await jobstore.get_logs_since("missing", 3) == (3, [])
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_evicted_oldest_first(monkeypatch):
+    monkeypatch.setattr(jobstore, "MAX_FINISHED_JOBS", 2)
+    await jobstore.create_job("build", "running", {"status": "running"})
+    for job_id in ("a", "b", "c"):
+        await jobstore.create_job("build", job_id, {"status": "running"}, logs=["started"])
+    for job_id in ("a", "b", "c"):
+        await jobstore.update_job(job_id, {"status": "completed"})
+
+    assert await jobstore.get_job("a") is None
+    assert await jobstore.get_logs("a") == []
+    assert [job["status"] for job in await jobstore.list_jobs("build")] == ["running", "completed", "completed"]
+    assert await jobstore.get_job("running") == {"status": "running"}
+
+
+@pytest.mark.asyncio
+async def test_idle_jobs_expire():
+    await jobstore.create_job("flash", "stale", {"status": "running"}, logs=["started"])
+    jobstore._memory_touched["stale"] = time.monotonic() - jobstore.JOB_TTL_SECONDS - 1
+    await jobstore.create_job("flash", "fresh", {"status": "running"})
+
+    assert await jobstore.get_job("stale") is None
+    assert await jobstore.get_log_count("stale") == 0
+    assert await jobstore.get_job("fresh") == {"status": "running"}
+
+    # Late writes to an expired job are ignored rather than recreating it
+    await jobstore.update_job("stale", {"status": "failed"})
+    assert await jobstore.append_log("stale", "too late") == 0
+    assert await jobstore.get_job("stale") is None
+
+
+@pytest.mark.asyncio
+async def test_job_watcher_wakes_on_changes():
+    await jobstore.create_job("flash", "j1", {"status": "running"})
+
+    async with jobstore.JobWatcher("j1") as watcher:
+        assert not await watcher.wait(timeout=0.01)
+
+        await jobstore.append_log("j1", "one")
+        await jobstore.append_log("j1", "two")
+        # A burst of changes is a single wakeup
+        assert await watcher.wait(timeout=1)
+        assert not await watcher.wait(timeout=0.01)
+
+        await jobstore.update_job("j1", {"status": "completed"})
+        assert await watcher.wait(timeout=1)
+
+        # Changes to other jobs don't wake it
+        await jobstore.create_job("flash", "j2", {"status": "running"})
+        await jobstore.append_log("j2", "other")
+        assert not await watcher.wait(timeout=0.01)
+
+    assert "j1" not in jobstore._watchers
+
+
+@pytest.mark.asyncio
+async def test_claim_job_refuses_running_jobs():
+    assert await jobstore.claim_job("download", "d1", {"status": "downloading", "progress": 0.0})
+    assert not await jobstore.claim_job("download", "d1", {"status": "downloading", "progress": 0.0})
+
+    await jobstore.update_job("d1", {"status": "error", "progress": 50.0})
+    assert await jobstore.claim_job("download", "d1", {"status": "downloading", "progress": 0.0})
+    assert await jobstore.get_job("d1") == {"status": "downloading", "progress": 0.0}
+    assert [job["status"] for job in await jobstore.list_jobs("download")] == ["downloading"]
+
+
+@pytest.mark.asyncio
+async def test_cancel_requests_reach_the_running_job(monkeypatch):
+    monkeypatch.setattr(jobstore, "_cancel_handlers", {})
+    cancelled = []
+    await jobstore.add_cancel_handler("j1", cancelled.append)
+
+    await jobstore.request_cancel("j1")
+    await jobstore.request_cancel("other")
+    assert cancelled == ["j1"]
+
+    jobstore.remove_cancel_handler("j1")
+    await jobstore.request_cancel("j1")
+    assert cancelled == ["j1"]
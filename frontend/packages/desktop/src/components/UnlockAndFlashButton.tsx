@@ -60,11 +60,11 @@ export function UnlockAndFlashButton({ device, trigger }: UnlockAndFlashButtonPr
         }
       };
 
-      eventSource.addEventListener('log', (event) => {
+      eventSource.addEventListener('logs', (event) => {
         try {
           const data = JSON.parse(event.data);
-          if (data.line) {
-            setLogs(prev => [...prev, data.line]);
+          if (Array.isArray(data.lines) && data.lines.length > 0) {
+            setLogs(prev => [...prev, ...data.lines]);
           }
         } catch (err) {
           // Ignore parse errors